@@ -1,9 +1,5 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-import plotly.express as px
+# pandas and plotly are imported where results are shown, so the first page load stays fast
 from fastq_converter import FastqConverter
 from sample_data import get_sample_fastq_entries
 import io
@@ -57,11 +53,11 @@ with st.sidebar:
     """)
     
     st.subheader("Quality Score Interpretation")
-    quality_table = pd.DataFrame({
+    quality_table = {
         'Phred Score': [10, 20, 30, 40, 50],
         'Error Probability': ['10⁻¹ (0.1)', '10⁻² (0.01)', '10⁻³ (0.001)', '10⁻⁴ (0.0001)', '10⁻⁵ (0.00001)'],
         'Accuracy': ['90%', '99%', '99.9%', '99.99%', '99.999%']
-    })
+    }
     st.dataframe(quality_table, use_container_width=True)
 
 # Initialize variables
@@ -118,6 +114,8 @@ with col2:
             results = converter.convert_quality_string(quality_string, offset)
             
             # Display results table
+            import pandas as pd
+
             st.subheader("Conversion Results")
             df = pd.DataFrame(results)
             st.dataframe(df, use_container_width=True)
@@ -143,6 +141,7 @@ with col2:
 # Visualization section
 if quality_string and df is not None:
     st.header("📊 Visualization")
+    import plotly.express as px
     
     tab1, tab2, tab3 = st.tabs(["Error Probabilities", "Phred Scores", "Step-by-Step"])
     
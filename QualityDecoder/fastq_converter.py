@@ -1,6 +1,7 @@
 import math
-import pandas as pd
-from typing import List, Dict, Any
+import numpy as np
+from contextlib import nullcontext
+from typing import List, Dict, Any, Iterable, Optional
 
 class FastqConverter:
     """
@@ -9,8 +10,15 @@ class FastqConverter:
     Supports both Phred+33 (Sanger) and Phred+64 (Illumina 1.3+) encoding standards.
     """
     
-    def __init__(self):
-        """Initialize the converter with encoding information."""
+    def __init__(self, recorder: Optional[Any] = None):
+        """
+        Initialize the converter with encoding information.
+        
+        Args:
+            recorder: Optional instrumentation recorder (``instrumentation.Recorder``
+                or anything with ``stage(name)`` and ``count(name, n)``)
+        """
+        self.recorder = recorder
         self.encoding_info = {
             33: {
                 'name': 'Phred+33 (Sanger)',
@@ -26,6 +34,10 @@ class FastqConverter:
             }
         }
     
+    def _stage(self, name: str):
+        """Timing context for ``name`` (a no-op without a recorder)."""
+        return self.recorder.stage(name) if self.recorder is not None else nullcontext()
+    
     def ascii_to_phred(self, ascii_char: str, offset: int = 33) -> int:
         """
         Convert ASCII character to Phred score.
@@ -89,27 +101,30 @@ class FastqConverter:
         
         results = []
         
-        for i, char in enumerate(quality_string):
-            try:
-                ascii_value = ord(char)
-                phred_score = self.ascii_to_phred(char, offset)
-                error_probability = self.phred_to_error_probability(phred_score)
-                accuracy = 1 - error_probability
-                
-                result = {
-                    'Position': i + 1,
-                    'ASCII Character': char,
-                    'ASCII Value': ascii_value,
-                    'Phred Score': phred_score,
-                    'Error Probability': error_probability,
-                    'Accuracy': accuracy,
-                    'Accuracy (%)': accuracy * 100
-                }
-                results.append(result)
-                
-            except Exception as e:
-                raise ValueError(f"Error processing character '{char}' at position {i + 1}: {str(e)}")
+        with self._stage('convert_quality_string'):
+            for i, char in enumerate(quality_string):
+                try:
+                    ascii_value = ord(char)
+                    phred_score = self.ascii_to_phred(char, offset)
+                    error_probability = self.phred_to_error_probability(phred_score)
+                    accuracy = 1 - error_probability
+                    
+                    result = {
+                        'Position': i + 1,
+                        'ASCII Character': char,
+                        'ASCII Value': ascii_value,
+                        'Phred Score': phred_score,
+                        'Error Probability': error_probability,
+                        'Accuracy': accuracy,
+                        'Accuracy (%)': accuracy * 100
+                    }
+                    results.append(result)
+                    
+                except Exception as e:
+                    raise ValueError(f"Error processing character '{char}' at position {i + 1}: {str(e)}")
         
+        if self.recorder is not None:
+            self.recorder.count('quality_bases', len(quality_string))
         return results
     
     def get_quality_statistics(self, quality_string: str, offset: int = 33) -> Dict[str, Any]:
@@ -124,23 +139,33 @@ class FastqConverter:
             Dictionary with summary statistics
         """
         results = self.convert_quality_string(quality_string, offset)
-        df = pd.DataFrame(results)
+        with self._stage('quality_statistics'):
+            stats = self._summarize(quality_string, results, offset)
+        return stats
+    
+    def _summarize(self, quality_string: str, results: List[Dict[str, Any]], offset: int) -> Dict[str, Any]:
+        phred = np.fromiter((r['Phred Score'] for r in results), dtype=np.int64, count=len(results))
+        error = np.fromiter((r['Error Probability'] for r in results), dtype=np.float64, count=len(results))
+        
+        # Quality distribution ordered like pandas value_counts: most frequent first, ties by first occurrence
+        values, first_seen, counts = np.unique(phred, return_index=True, return_counts=True)
+        order = np.lexsort((first_seen, -counts))
         
         stats = {
             'total_bases': len(quality_string),
             'encoding': self.encoding_info[offset]['name'],
-            'min_phred': df['Phred Score'].min(),
-            'max_phred': df['Phred Score'].max(),
-            'mean_phred': df['Phred Score'].mean(),
-            'median_phred': df['Phred Score'].median(),
-            'std_phred': df['Phred Score'].std(),
-            'min_error_prob': df['Error Probability'].min(),
-            'max_error_prob': df['Error Probability'].max(),
-            'mean_error_prob': df['Error Probability'].mean(),
-            'mean_accuracy': df['Accuracy'].mean(),
-            'bases_above_q20': sum(1 for score in df['Phred Score'] if score >= 20),
-            'bases_above_q30': sum(1 for score in df['Phred Score'] if score >= 30),
-            'quality_distribution': df['Phred Score'].value_counts().to_dict()
+            'min_phred': phred.min(),
+            'max_phred': phred.max(),
+            'mean_phred': phred.mean(),
+            'median_phred': np.median(phred),
+            'std_phred': phred.std(ddof=1) if len(phred) > 1 else float('nan'),
+            'min_error_prob': error.min(),
+            'max_error_prob': error.max(),
+            'mean_error_prob': error.mean(),
+            'mean_accuracy': (1 - error).mean(),
+            'bases_above_q20': int(np.count_nonzero(phred >= 20)),
+            'bases_above_q30': int(np.count_nonzero(phred >= 30)),
+            'quality_distribution': {int(values[i]): int(counts[i]) for i in order}
         }
         
         # Calculate percentages
@@ -149,6 +174,79 @@ class FastqConverter:
         
         return stats
     
+    def get_batch_statistics(self, quality_strings: Iterable[str], offset: int = 33) -> List[Dict[str, Any]]:
+        """
+        Get summary statistics for many quality strings (e.g. every read of a FASTQ file).
+        
+        Args:
+            quality_strings: FASTQ quality strings, one per read
+            offset: Encoding offset
+            
+        Returns:
+            List of statistics dictionaries, one per read
+        """
+        batch = []
+        with self._stage('batch_statistics'):
+            for quality_string in quality_strings:
+                batch.append(self.get_quality_statistics(quality_string, offset))
+        if self.recorder is not None:
+            self.recorder.count('quality_reads', len(batch))
+        return batch
+    
+    def quality_histogram(self, fastq_path: str, offset: int = 33, cache: Optional[Any] = None,
+                          batch_size: int = 100_000) -> np.ndarray:
+        """
+        Count how many bases of a FASTQ file have each Phred score.
+        
+        Args:
+            fastq_path: FASTQ file (4 lines per read)
+            offset: Encoding offset
+            cache: Optional ``result_cache.ResultCache``; the histogram is then
+                reused until the file content changes
+            batch_size: Reads decoded per NumPy batch
+            
+        Returns:
+            Array where element ``q`` is the number of bases with Phred score ``q``
+            
+        Raises:
+            ValueError: If a quality character is invalid for the encoding
+        """
+        if cache is not None:
+            return cache.get_or_compute(
+                'fastq_converter.quality_histogram',
+                lambda: self.quality_histogram(fastq_path, offset, batch_size=batch_size),
+                params={'offset': offset}, inputs=[fastq_path]
+            )
+        
+        min_ascii, max_ascii = self.encoding_info[offset]['ascii_range']
+        histogram = np.zeros(max_ascii - offset + 1, dtype=np.int64)
+        n_reads = 0
+        
+        def add_batch(lines: List[bytes]) -> None:
+            codes = np.frombuffer(b"".join(lines), dtype=np.uint8)
+            if codes.size and (codes.min() < min_ascii or codes.max() > max_ascii):
+                bad = codes[(codes < min_ascii) | (codes > max_ascii)][0]
+                raise ValueError(f"ASCII value {bad} out of range for {self.encoding_info[offset]['name']}")
+            histogram[:] += np.bincount(codes - offset, minlength=histogram.size)
+        
+        with self._stage('quality_histogram'):
+            batch = []
+            with open(fastq_path, 'rb') as file:
+                for i, line in enumerate(file):
+                    if i % 4 == 3:
+                        batch.append(line.rstrip(b"\r\n"))
+                        if len(batch) == batch_size:
+                            add_batch(batch)
+                            n_reads += len(batch)
+                            batch = []
+            add_batch(batch)
+            n_reads += len(batch)
+        
+        if self.recorder is not None:
+            self.recorder.count('quality_reads', n_reads)
+            self.recorder.count('quality_bases', int(histogram.sum()))
+        return histogram
+    
     def validate_quality_string(self, quality_string: str, offset: int = 33) -> Dict[str, Any]:
         """
         Validate quality string and return validation results.
@@ -1,145 +1,191 @@
 # ===================== IMPORT PACKAGES =====================
-import subprocess
+# Plotting libraries (matplotlib, seaborn, joypy, plotly) and UMAP are imported
+# inside the stages that use them so that `--help` and imports stay fast.
+import argparse
 import sys
 import os
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-from sklearn.decomposition import PCA
-import umap
-from joypy import joyplot
+from reduction import ReductionStage
 import webbrowser
-import imageio
-
-# ===================== 0. CHECK & INSTALL MISSING PACKAGES =====================
-packages = {
-    "numpy": "numpy",
-    "pandas": "pandas",
-    "matplotlib": "matplotlib",
-    "seaborn": "seaborn",
-    "plotly": "plotly",
-    "scikit-learn": "sklearn",
-    "umap-learn": "umap",
-    "joypy": "joypy",
-    "kaleido": "kaleido",  # Needed for static 3D export
-    "imageio": "imageio"
-}
-
-for pkg, import_name in packages.items():
-    try:
-        __import__(import_name)
-    except ModuleNotFoundError:
-        print(f"Installing {pkg}...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
+from render import FigureRenderer
+
+# instrumentation.py lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import get_recorder, recording
+from result_cache import ResultCache, data_hash
+
 
 # ===================== 1. PARAMETERS =====================
-np.random.seed(42)
 n_cells = 500
 n_genes = 1000
 
-# ===================== 2. SIMULATE DATA =====================
-pseudotime = np.sort(np.random.rand(n_cells))
-clones = np.random.choice([0, 1, 2], size=n_cells, p=[0.5, 0.3, 0.2])
-mutation_load = clones * np.random.rand(n_cells) * 3
-
-expr = np.random.negative_binomial(
-    n=2, p=0.5, size=(n_genes, n_cells)).astype('float64')
-expr += (pseudotime * 5)[None, :]
-expr += mutation_load[None, :]
 
-expr_df = pd.DataFrame(expr, index=[f"Gene{i+1}" for i in range(n_genes)],
-                       columns=[f"Cell{i+1}" for i in range(n_cells)])
+# ===================== 2. SIMULATE DATA =====================
+def simulate_data(n_cells=n_cells, n_genes=n_genes, seed=42):
+    """Simulate a genes x cells expression matrix and per-cell metadata."""
+    np.random.seed(seed)
+    pseudotime = np.sort(np.random.rand(n_cells))
+    clones = np.random.choice([0, 1, 2], size=n_cells, p=[0.5, 0.3, 0.2])
+    mutation_load = clones * np.random.rand(n_cells) * 3
+
+    expr = np.random.negative_binomial(
+        n=2, p=0.5, size=(n_genes, n_cells)).astype('float64')
+    expr += (pseudotime * 5)[None, :]
+    expr += mutation_load[None, :]
+
+    expr_df = pd.DataFrame(expr, index=[f"Gene{i+1}" for i in range(n_genes)],
+                           columns=[f"Cell{i+1}" for i in range(n_cells)])
+
+    meta = pd.DataFrame({
+        'Cell': expr_df.columns,
+        'Pseudotime': pseudotime,
+        'Clone': clones,
+        'Mutation_Load': mutation_load
+    })
+    return expr_df, meta
 
-meta = pd.DataFrame({
-    'Cell': expr_df.columns,
-    'Pseudotime': pseudotime,
-    'Clone': clones,
-    'Mutation_Load': mutation_load
-})
 
 # ===================== 3. PCA + UMAP =====================
-pca = PCA(n_components=10)
-pcs = pca.fit_transform(expr_df.T)
+def reduce_dimensions(expr_df, meta, result_cache):
+    """Add UMAP and PC coordinates to ``meta`` from a single cached PCA fit."""
+    # One incremental PCA fit (cached on disk) feeds both UMAP and the 3D plot
+    recorder = get_recorder()
+    reduction = ReductionStage(result_cache, n_components=10, random_state=42)
+    with recorder.stage("pca"):
+        pcs = reduction.fit_pca(expr_df.T.values)
+    with recorder.stage("umap"):
+        umap_coords = reduction.fit_umap(pcs)
+    meta['UMAP1'] = umap_coords[:, 0]
+    meta['UMAP2'] = umap_coords[:, 1]
+    meta['PC1'], meta['PC2'], meta['PC3'] = pcs[:, 0], pcs[:, 1], pcs[:, 2]
+    return reduction
 
-reducer = umap.UMAP(n_components=2, random_state=42)
-umap_coords = reducer.fit_transform(pcs)
-meta['UMAP1'] = umap_coords[:, 0]
-meta['UMAP2'] = umap_coords[:, 1]
 
 # ===================== 4. 2D UMAP PLOT =====================
-plt.figure(figsize=(6, 5))
-sc = plt.scatter(meta['UMAP1'], meta['UMAP2'],
-                 c=meta['Pseudotime'], cmap='plasma', s=20)
-plt.colorbar(sc, label='Pseudotime')
-plt.xlabel('UMAP1')
-plt.ylabel('UMAP2')
-plt.title('2D UMAP')
-plt.tight_layout()
-plt.savefig('UMAP.png', dpi=300)
-plt.close()
+def plot_umap(meta, renderer):
+    def draw(path):
+        import matplotlib.pyplot as plt
+
+        plt.figure(figsize=(6, 5))
+        sc = plt.scatter(meta['UMAP1'], meta['UMAP2'],
+                         c=meta['Pseudotime'], cmap='plasma', s=20)
+        plt.colorbar(sc, label='Pseudotime')
+        plt.xlabel('UMAP1')
+        plt.ylabel('UMAP2')
+        plt.title('2D UMAP')
+        plt.tight_layout()
+        plt.savefig(path, dpi=300)
+        plt.close()
+
+    # Redrawn only when the plotted data changes
+    key = data_hash("umap", 300, meta[['UMAP1', 'UMAP2', 'Pseudotime']])
+    renderer.write_figure('UMAP.png', key, draw)
+
 
 # ===================== 5. RIDGELINE PLOT =====================
-plt.figure(figsize=(6, 5))
-joyplot(data=meta, by='Clone', column='Pseudotime', colormap=plt.cm.viridis)
-plt.title('Ridgeline plot by Clone')
-plt.tight_layout()
-plt.savefig('Ridgeline.png', dpi=300)
-plt.close()
+def plot_ridgeline(meta, renderer):
+    def draw(path):
+        import matplotlib.pyplot as plt
+        from joypy import joyplot
+
+        plt.figure(figsize=(6, 5))
+        joyplot(data=meta, by='Clone', column='Pseudotime', colormap=plt.cm.viridis)
+        plt.title('Ridgeline plot by Clone')
+        plt.tight_layout()
+        plt.savefig(path, dpi=300)
+        plt.close()
+
+    key = data_hash("ridgeline", 300, meta[['Clone', 'Pseudotime']])
+    renderer.write_figure('Ridgeline.png', key, draw)
+
 
 # ===================== 6. HEATMAP =====================
-top30_genes = expr_df.var(axis=1).sort_values(ascending=False).head(30).index
-plt.figure(figsize=(10, 6))
-sns.heatmap(expr_df.loc[top30_genes], cmap='viridis')
-plt.title('Top 30 Variable Genes')
-plt.tight_layout()
-plt.savefig('Heatmap.png', dpi=300)
-plt.close()
+def plot_heatmap(expr_df, renderer):
+    top30_genes = expr_df.var(axis=1).sort_values(ascending=False).head(30).index
+    top30 = expr_df.loc[top30_genes]
+
+    def draw(path):
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        plt.figure(figsize=(10, 6))
+        sns.heatmap(top30, cmap='viridis')
+        plt.title('Top 30 Variable Genes')
+        plt.tight_layout()
+        plt.savefig(path, dpi=300)
+        plt.close()
+
+    key = data_hash("heatmap", 300, list(top30.index), top30)
+    renderer.write_figure('Heatmap.png', key, draw)
+
 
 # ===================== 7. 3D INTERACTIVE PLOT + GIF =====================
-pca3 = PCA(n_components=3)
-umap3d = pca3.fit_transform(expr_df.T)
-meta['PC1'], meta['PC2'], meta['PC3'] = umap3d[:, 0], umap3d[:, 1], umap3d[:, 2]
-
-fig = px.scatter_3d(meta, x='PC1', y='PC2', z='PC3',
-                    color='Pseudotime', size='Mutation_Load',
-                    color_continuous_scale='plasma',
-                    title='3D Interactive Plot')
-
-# Save interactive HTML
-html_file = "UMAP_3D.html"
-fig.write_html(html_file)
-
-# Save static PNG snapshot
-fig.write_image("UMAP_3D.png")  # requires kaleido
-
-# Generate rotating GIF
-frames = []
-frame_folder = "gif_frames"
-os.makedirs(frame_folder, exist_ok=True)
-
-for angle in range(0, 360, 10):
-    camera = dict(eye=dict(
-        x=2*np.sin(np.radians(angle)),
-        y=2*np.cos(np.radians(angle)),
-        z=1
-    ))
-    fig.update_layout(scene_camera=camera)
-    frame_path = os.path.join(frame_folder, f"frame_{angle}.png")
-    fig.write_image(frame_path)
-    frames.append(imageio.imread(frame_path))
-
-gif_file = "UMAP_3D_Rotating.gif"
-imageio.mimsave(gif_file, frames, fps=5)
-
-# Automatically open the interactive HTML in default browser
-webbrowser.open('file://' + os.path.realpath(html_file))
-
-print("All plots generated:")
-print("- 2D UMAP: UMAP.png")
-print("- Ridgeline: Ridgeline.png")
-print("- Heatmap: Heatmap.png")
-print("- 3D interactive: UMAP_3D.html")
-print("- 3D static snapshot: UMAP_3D.png")
-print("- 3D rotating GIF (LinkedIn-ready): UMAP_3D_Rotating.gif")
+def plot_3d(meta, renderer, open_browser=False):
+    import plotly.express as px
+
+    fig = px.scatter_3d(meta, x='PC1', y='PC2', z='PC3',
+                        color='Pseudotime', size='Mutation_Load',
+                        color_continuous_scale='plasma',
+                        title='3D Interactive Plot')
+
+    # Save interactive HTML
+    html_file = "UMAP_3D.html"
+    renderer.write_html(fig, html_file)
+
+    # Save static PNG snapshot
+    renderer.write_image(fig, "UMAP_3D.png")  # requires kaleido
+
+    # Generate rotating GIF (frames rendered in parallel, in memory; skipped if unchanged)
+    gif_file = "UMAP_3D_Rotating.gif"
+    renderer.write_rotating_gif(fig, gif_file, angles=range(0, 360, 10), fps=5)
+
+    if open_browser:
+        webbrowser.open('file://' + os.path.realpath(html_file))
+
+
+def main(argv=None):
+    # Side effects are opt-in so the pipeline can run headless on batch nodes
+    parser = argparse.ArgumentParser(description="Simulated single-cell plots")
+    parser.add_argument("--open-browser", action="store_true",
+                        help="open the interactive 3D plot in the default browser")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes used to render GIF frames (default: CPU count)")
+    parser.add_argument("--metrics", default=None,
+                        help="write per-stage timings, counters and peak memory to this JSON file")
+    parser.add_argument("--profile", default=None,
+                        help="write a cProfile dump (.prof) of the run to this file")
+    parser.add_argument("--cache-dir", default="result_cache",
+                        help="shared result cache reused across runs (PCA/UMAP results)")
+    args = parser.parse_args(argv)
+
+    with recording(metrics_path=args.metrics, profile_path=args.profile):
+        recorder = get_recorder()
+        with recorder.stage("simulate"):
+            expr_df, meta = simulate_data()
+        recorder.count("cells", expr_df.shape[1])
+        recorder.count("genes", expr_df.shape[0])
+        reduce_dimensions(expr_df, meta, ResultCache(args.cache_dir))
+        # Every output is skipped when its input data is unchanged since the last run
+        renderer = FigureRenderer(output_dir=".", workers=args.workers)
+        with recorder.stage("plot_umap"):
+            plot_umap(meta, renderer)
+        with recorder.stage("plot_ridgeline"):
+            plot_ridgeline(meta, renderer)
+        with recorder.stage("plot_heatmap"):
+            plot_heatmap(expr_df, renderer)
+        with recorder.stage("plot_3d"):
+            plot_3d(meta, renderer, open_browser=args.open_browser)
+
+    print("All plots generated:")
+    print("- 2D UMAP: UMAP.png")
+    print("- Ridgeline: Ridgeline.png")
+    print("- Heatmap: Heatmap.png")
+    print("- 3D interactive: UMAP_3D.html")
+    print("- 3D static snapshot: UMAP_3D.png")
+    print("- 3D rotating GIF (LinkedIn-ready): UMAP_3D_Rotating.gif")
+
+
+# The render stage uses a process pool, so the pipeline must only run when executed directly
+if __name__ == "__main__":
+    main()
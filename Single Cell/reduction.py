@@ -0,0 +1,228 @@
+"""
+Dimensionality-reduction stage for the single-cell pipeline.
+
+Fits PCA once over cell batches, caches the principal components in the
+shared result cache and keeps the fitted PCA/UMAP models so new cells can be projected into an
+existing embedding instead of refitting everything.
+"""
+
+import hashlib
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    # scikit-learn is imported when a PCA is actually fitted
+    from sklearn.decomposition import IncrementalPCA
+
+
+def iter_batches(cells: np.ndarray, batch_size: int, min_batch_size: int = 0) -> Iterator[np.ndarray]:
+    """
+    Yield consecutive row batches of a (cells x genes) matrix.
+
+    Works on in-memory arrays as well as ``np.memmap`` / ``np.load(mmap_mode='r')``
+    arrays, so only one batch is materialised at a time.
+
+    Args:
+        cells: Matrix with one row per cell
+        batch_size: Number of cells per batch
+        min_batch_size: A trailing batch smaller than this is merged into the
+            previous one (as ``sklearn.utils.gen_batches`` does)
+
+    Returns:
+        Iterator over float32 batches
+    """
+    n_cells = cells.shape[0]
+    start = 0
+    while start < n_cells:
+        stop = start + batch_size
+        if n_cells - stop < min_batch_size:
+            stop = n_cells
+        yield np.asarray(cells[start:stop], dtype=np.float32)
+        start = stop
+
+
+def hash_cells(cells: np.ndarray, batch_size: int = 4096) -> str:
+    """
+    Compute a content hash of a cell matrix without loading it all at once.
+
+    Args:
+        cells: Matrix with one row per cell
+        batch_size: Number of cells hashed per step
+
+    Returns:
+        Hex digest identifying the matrix contents and shape
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(cells.shape).encode())
+    for batch in iter_batches(cells, batch_size):
+        digest.update(np.ascontiguousarray(batch).tobytes())
+    return digest.hexdigest()
+
+
+class ReductionStage:
+    """
+    Incremental PCA + UMAP backed by the shared result cache.
+
+    A single PCA fit provides every embedding the pipeline needs: because
+    principal components are nested, the first three columns of a
+    10-component fit are the 3-component embedding.
+    """
+
+    def __init__(self, result_cache: Any, n_components: int = 10,
+                 batch_size: int = 1000, n_neighbors: int = 15, min_dist: float = 0.1,
+                 random_state: Optional[int] = 42):
+        """
+        Initialize the stage.
+
+        Args:
+            result_cache: Shared ``result_cache.ResultCache`` holding PCs, UMAP
+                coordinates and the fitted models
+            n_components: Number of principal components to keep
+            batch_size: Cells per PCA batch (must be >= n_components)
+            n_neighbors: UMAP neighbourhood size
+            min_dist: UMAP minimum distance
+            random_state: Seed for UMAP; ``None`` allows parallel, non-deterministic layout
+        """
+        if batch_size < n_components:
+            raise ValueError("batch_size must be at least n_components")
+
+        self.result_cache = result_cache
+        self.n_components = n_components
+        self.batch_size = batch_size
+        self.n_neighbors = n_neighbors
+        self.min_dist = min_dist
+        self.random_state = random_state
+
+        self.key: Optional[str] = None
+        self.umap_key: Optional[str] = None
+        self.pca: Optional["IncrementalPCA"] = None
+        self.umap_model: Any = None
+
+    # ===================== CACHE HELPERS =====================
+    def _params(self) -> Dict[str, Any]:
+        return {
+            'n_components': self.n_components,
+            'batch_size': self.batch_size,
+            'n_neighbors': self.n_neighbors,
+            'min_dist': self.min_dist,
+            'random_state': self.random_state,
+        }
+
+    # ===================== PCA =====================
+    def fit_pca(self, cells: np.ndarray) -> np.ndarray:
+        """
+        Fit incremental PCA over cell batches, or reuse the cached fit.
+
+        Args:
+            cells: Matrix of shape (cells, genes); may be memory-mapped
+
+        Returns:
+            Principal components of shape (cells, n_components), memory-mapped
+            from the cache
+        """
+        cells_hash = hash_cells(cells, self.batch_size)
+        self.key = self.result_cache.make_key("reduction.pca", self._params(), data=[cells_hash])
+
+        def compute():
+            pca = self._fit_incremental(cells)
+            pcs = np.vstack([pca.transform(batch) for batch in iter_batches(cells, self.batch_size)])
+            return {'pcs': pcs.astype(np.float32), 'pca': pca}
+
+        entry = self.result_cache.get_or_compute("reduction.pca", compute, self._params(),
+                                                 data=[cells_hash])
+        self.pca = entry['pca']
+        return entry['pcs']
+
+    def _fit_incremental(self, cells: np.ndarray) -> "IncrementalPCA":
+        from sklearn.decomposition import IncrementalPCA
+
+        pca = IncrementalPCA(n_components=self.n_components)
+        # A trailing batch smaller than n_components cannot be fitted on its own
+        for batch in iter_batches(cells, self.batch_size, min_batch_size=self.n_components):
+            pca.partial_fit(batch)
+        return pca
+
+    # ===================== UMAP =====================
+    def fit_umap(self, pcs: np.ndarray, approximate: bool = False) -> np.ndarray:
+        """
+        Fit UMAP on the principal components, or reuse the cached model.
+
+        Args:
+            pcs: Principal components returned by :meth:`fit_pca`
+            approximate: Force approximate nearest-neighbour search even on
+                small inputs (UMAP switches to it automatically on large ones)
+
+        Returns:
+            2D UMAP coordinates of shape (cells, 2)
+        """
+        if self.key is None:
+            raise RuntimeError("fit_pca must be called before fit_umap")
+
+        params, data = self._umap_key_parts(pcs, approximate)
+        self.umap_key = self.result_cache.make_key("reduction.umap", params, data=data)
+        entry = self.result_cache.get_or_compute(
+            "reduction.umap", lambda: self._fit_umap_model(pcs, approximate), params, data=data
+        )
+        self.umap_model = entry['model']
+        return entry['coords']
+
+    def _umap_key_parts(self, pcs: np.ndarray, approximate: bool) -> Tuple[Dict[str, Any], list]:
+        # Keyed by the PCs actually embedded, not just the PCA they came from
+        return {'pca': self.key, 'approximate': approximate}, [hash_cells(pcs, self.batch_size)]
+
+    def _fit_umap_model(self, pcs: np.ndarray, approximate: bool) -> Dict[str, Any]:
+        import umap
+
+        reducer = umap.UMAP(
+            n_components=2,
+            n_neighbors=self.n_neighbors,
+            min_dist=self.min_dist,
+            random_state=self.random_state,
+            force_approximation_algorithm=approximate,
+        )
+        coords = reducer.fit_transform(np.asarray(pcs)).astype(np.float32)
+        return {'coords': coords, 'model': reducer}
+
+    # ===================== PROJECTION =====================
+    def load(self, key: str, approximate: bool = False) -> None:
+        """
+        Load fitted models from a previous run by cache key.
+
+        Args:
+            key: Cache key recorded in ``self.key`` after fitting
+            approximate: Whether the UMAP to load was fitted with approximate
+                nearest neighbours
+        """
+        self.key = key
+        entry = self.result_cache.load(key)
+        if entry is None:
+            raise KeyError(f"No cached PCA for key {key}")
+        self.pca = entry['pca']
+        params, data = self._umap_key_parts(entry['pcs'], approximate)
+        self.umap_key = self.result_cache.make_key("reduction.umap", params, data=data)
+        umap_entry = self.result_cache.load(self.umap_key)
+        self.umap_model = umap_entry['model'] if umap_entry is not None else None
+
+    def project(self, new_cells: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Project new cells into the existing PCA and UMAP space without refitting.
+
+        Args:
+            new_cells: Matrix of shape (new_cells, genes) with the same genes
+                as the fitted data
+
+        Returns:
+            Tuple of (principal components, UMAP coordinates or ``None`` if
+            no UMAP model has been fitted)
+        """
+        if self.pca is None:
+            raise RuntimeError("No fitted PCA; call fit_pca or load first")
+
+        pcs = np.vstack([self.pca.transform(batch)
+                         for batch in iter_batches(new_cells, self.batch_size)])
+        pcs = pcs.astype(np.float32)
+        coords = None
+        if self.umap_model is not None:
+            coords = self.umap_model.transform(pcs).astype(np.float32)
+        return pcs, coords
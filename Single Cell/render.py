@@ -0,0 +1,199 @@
+"""
+Figure rendering stage for the single-cell pipeline.
+
+Renders static exports and rotating-GIF frames in a worker pool straight
+into memory, and skips any output whose figure hash has not changed since
+the last run.
+"""
+
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+MANIFEST_NAME = ".render_manifest.json"
+
+# Figure shared by all frames rendered in one worker process
+_worker_fig = None
+
+
+def figure_hash(fig, **params) -> str:
+    """
+    Hash a plotly figure together with any render parameters.
+
+    Args:
+        fig: Plotly figure
+        **params: Extra parameters that change the output (angles, fps, ...)
+
+    Returns:
+        Hex digest of the figure JSON and parameters
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(fig.to_json().encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def camera_for_angle(angle: float, radius: float = 2, height: float = 1) -> Dict:
+    """Return a plotly scene camera orbiting the z axis at the given angle (degrees)."""
+    return dict(eye=dict(
+        x=radius * np.sin(np.radians(angle)),
+        y=radius * np.cos(np.radians(angle)),
+        z=height
+    ))
+
+
+def _init_worker(fig_json: str) -> None:
+    import plotly.io as pio
+
+    global _worker_fig
+    _worker_fig = pio.from_json(fig_json)
+
+
+def _render_angle(angle: float) -> bytes:
+    _worker_fig.update_layout(scene_camera=camera_for_angle(angle))
+    return _worker_fig.to_image(format="png")
+
+
+class FigureRenderer:
+    """
+    Cached, parallel exporter for plotly (and matplotlib) figures.
+
+    Output hashes are kept in a small JSON manifest next to the outputs, so a
+    re-run with unchanged input data does no rendering at all.
+    """
+
+    def __init__(self, output_dir: str = ".", workers: Optional[int] = None):
+        """
+        Initialize the renderer.
+
+        Args:
+            output_dir: Directory that outputs and the manifest are written to
+            workers: Size of the frame-rendering pool (defaults to CPU count)
+        """
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self._manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self._manifest = self._load_manifest()
+
+    # ===================== MANIFEST =====================
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(self._manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+
+    def is_current(self, filename: str, key: str) -> bool:
+        """Return True if ``filename`` exists and was rendered from ``key``."""
+        path = os.path.join(self.output_dir, filename)
+        return os.path.exists(path) and self._manifest.get(filename) == key
+
+    def _record(self, filename: str, key: str) -> None:
+        self._manifest[filename] = key
+        self._save_manifest()
+
+    # ===================== EXPORTS =====================
+    def write_html(self, fig, filename: str) -> bool:
+        """
+        Write interactive HTML unless it is already up to date.
+
+        Returns:
+            True if the file was (re)written, False if it was skipped
+        """
+        key = figure_hash(fig, kind="html")
+        if self.is_current(filename, key):
+            return False
+        fig.write_html(os.path.join(self.output_dir, filename))
+        self._record(filename, key)
+        return True
+
+    def write_image(self, fig, filename: str) -> bool:
+        """
+        Write a static image (requires kaleido) unless it is already up to date.
+
+        Returns:
+            True if the file was (re)written, False if it was skipped
+        """
+        key = figure_hash(fig, kind="image")
+        if self.is_current(filename, key):
+            return False
+        fig.write_image(os.path.join(self.output_dir, filename))
+        self._record(filename, key)
+        return True
+
+    def write_figure(self, filename: str, key: str, draw: Callable[[str], None]) -> bool:
+        """
+        Write a figure produced by any plotting library unless it is up to date.
+
+        Args:
+            filename: Output file name inside ``output_dir``
+            key: Hash of everything the figure depends on (input data, settings)
+            draw: Function that renders the figure to the path it is given
+
+        Returns:
+            True if the file was (re)written, False if it was skipped
+        """
+        if self.is_current(filename, key):
+            return False
+        draw(os.path.join(self.output_dir, filename))
+        self._record(filename, key)
+        return True
+
+    def render_frames(self, fig, angles: Iterable[float]) -> List[bytes]:
+        """
+        Render one PNG per camera angle in a process pool.
+
+        Args:
+            fig: Plotly 3D figure
+            angles: Camera angles in degrees
+
+        Returns:
+            PNG-encoded frames in the order of ``angles``
+        """
+        angles = list(angles)
+        if self.workers == 1:
+            _init_worker(fig.to_json())
+            return [_render_angle(angle) for angle in angles]
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(angles)),
+                                 initializer=_init_worker,
+                                 initargs=(fig.to_json(),)) as pool:
+            return list(pool.map(_render_angle, angles))
+
+    def write_rotating_gif(self, fig, filename: str, angles: Iterable[float] = range(0, 360, 10),
+                           fps: int = 5) -> bool:
+        """
+        Render a rotating GIF of a 3D figure from in-memory frames.
+
+        Args:
+            fig: Plotly 3D figure
+            filename: GIF file name inside ``output_dir``
+            angles: Camera angles in degrees, one frame each
+            fps: Frames per second of the GIF
+
+        Returns:
+            True if the GIF was (re)rendered, False if it was skipped
+        """
+        import imageio.v2 as imageio
+
+        angles = list(angles)
+        key = figure_hash(fig, kind="gif", angles=angles, fps=fps)
+        if self.is_current(filename, key):
+            return False
+
+        frames = [imageio.imread(io.BytesIO(png)) for png in self.render_frames(fig, angles)]
+        imageio.mimsave(os.path.join(self.output_dir, filename), frames, fps=fps)
+        self._record(filename, key)
+        return True
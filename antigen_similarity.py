@@ -0,0 +1,205 @@
+"""
+Batched all-vs-all peptide similarity for CAR-T off-target screening.
+
+Scores are ``Levenshtein.ratio`` (normalized indel similarity), computed in
+parallel chunks with rapidfuzz (the engine behind python-Levenshtein). When
+a threshold is given, a k-mer prefilter drops every pair that provably
+cannot reach it before any alignment work is done.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from rapidfuzz.distance import Indel
+from rapidfuzz.process import cdist
+from scipy import sparse
+
+# Target-side state shared by every chunk processed in a worker
+_targets: List[str] = []
+_target_kmers = None
+_target_lengths = None
+_vocab: Dict[Tuple[str, int], int] = {}
+
+
+def read_fasta_sequences(filepath: str) -> Dict[str, str]:
+    """Reads every record of a (multi-)FASTA file into an ``{id: sequence}`` dict."""
+    sequences = {}
+    name = None
+    chunks = []
+    with open(filepath, "r") as file:
+        for line in file:
+            if line.startswith(">"):
+                if name is not None:
+                    sequences[name] = "".join(chunks)
+                name = line[1:].split()[0] if line[1:].strip() else f"seq{len(sequences) + 1}"
+                chunks = []
+            else:
+                chunks.append(line.strip().upper())
+    if name is not None:
+        sequences[name] = "".join(chunks)
+    return sequences
+
+
+def kmer_matrix(sequences: Sequence[str], k: int = 3,
+                vocab: Optional[Dict[Tuple[str, int], int]] = None,
+                grow_vocab: bool = True) -> Tuple[sparse.csr_matrix, Dict[Tuple[str, int], int]]:
+    """
+    Build a binary occurrence matrix of k-mers.
+
+    The j-th repeat of a k-mer in a sequence is its own feature ``(kmer, j)``,
+    so the dot product of two rows is the multiset k-mer overlap.
+
+    Args:
+        sequences: Peptide or nucleotide sequences
+        k: K-mer length
+        vocab: Existing feature vocabulary to extend or look up
+        grow_vocab: If False, k-mers missing from ``vocab`` are ignored
+
+    Returns:
+        Tuple of (sparse matrix of shape (sequences, features), vocabulary)
+    """
+    vocab = {} if vocab is None else vocab
+    indptr = [0]
+    indices = []
+    for seq in sequences:
+        seen: Dict[str, int] = {}
+        for i in range(len(seq) - k + 1):
+            kmer = seq[i:i + k]
+            occurrence = seen.get(kmer, 0)
+            seen[kmer] = occurrence + 1
+            key = (kmer, occurrence)
+            idx = vocab.get(key)
+            if idx is None:
+                if not grow_vocab:
+                    continue
+                idx = vocab[key] = len(vocab)
+            indices.append(idx)
+        indptr.append(len(indices))
+
+    data = np.ones(len(indices), dtype=np.int32)
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(sequences), max(len(vocab), 1)))
+    return matrix, vocab
+
+
+def candidate_mask(shared: np.ndarray, query_lengths: np.ndarray, target_lengths: np.ndarray,
+                   threshold: float, k: int) -> np.ndarray:
+    """
+    Return the pairs that may reach ``threshold`` according to the q-gram lemma.
+
+    A similarity ``r`` means at most ``(1 - r) * (la + lb)`` indels, and every
+    edit destroys at most ``k`` shared k-mers, so pairs with fewer shared
+    k-mers than ``max(la, lb) - k + 1 - k * edits`` are safely skipped.
+    """
+    la = query_lengths[:, None]
+    lb = target_lengths[None, :]
+    max_edits = np.floor((1 - threshold) * (la + lb) + 1e-9)
+    required = np.maximum(la, lb) - k + 1 - k * max_edits
+    return shared >= required
+
+
+def _init_worker(targets: List[str], k: int, vocab: Dict[Tuple[str, int], int],
+                 target_kmers: Optional[sparse.csr_matrix]) -> None:
+    global _targets, _target_kmers, _target_lengths, _vocab
+    _targets = targets
+    _target_lengths = np.array([len(t) for t in targets], dtype=np.int64)
+    _vocab = vocab
+    _target_kmers = target_kmers.T.tocsr() if target_kmers is not None else None
+
+
+def _score_chunk(args) -> Tuple[int, Union[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    start, queries, threshold, k = args
+
+    if threshold is None:
+        scores = cdist(queries, _targets, scorer=Indel.normalized_similarity,
+                       dtype=np.float32, workers=1)
+        return start, scores
+
+    query_kmers, _ = kmer_matrix(queries, k, vocab=_vocab, grow_vocab=False)
+    shared = (query_kmers @ _target_kmers).toarray()
+    query_lengths = np.array([len(q) for q in queries], dtype=np.int64)
+    mask = candidate_mask(shared, query_lengths, _target_lengths, threshold, k)
+
+    columns = np.flatnonzero(mask.any(axis=0))
+    if columns.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return start, (empty, empty, np.empty(0, dtype=np.float32))
+
+    # Small slack so scores that equal the threshold are not lost to float rounding
+    scores = cdist(queries, [_targets[c] for c in columns], scorer=Indel.normalized_similarity,
+                   score_cutoff=max(threshold - 1e-6, 0.0), dtype=np.float32, workers=1)
+    rows, cols = np.nonzero(scores)
+    return start, (rows + start, columns[cols], scores[rows, cols])
+
+
+def similarity_matrix(queries: Sequence[str], targets: Optional[Sequence[str]] = None,
+                      threshold: Optional[float] = None, as_sparse: bool = False, k: int = 3,
+                      chunk_size: int = 256,
+                      workers: Optional[int] = None) -> Union[np.ndarray, sparse.csr_matrix]:
+    """
+    Compute ``Levenshtein.ratio`` for every query/target pair.
+
+    Args:
+        queries: Candidate antigen peptides
+        targets: Proteome to screen against (defaults to ``queries``)
+        threshold: Drop scores below this value and enable the k-mer prefilter
+        as_sparse: Return a CSR matrix holding only scores >= ``threshold``
+        k: K-mer length used by the prefilter
+        chunk_size: Query rows scored per task
+        workers: Number of processes (defaults to CPU count; 1 runs in-process)
+
+    Returns:
+        Float32 matrix of shape (queries, targets), dense or CSR
+    """
+    if as_sparse and threshold is None:
+        raise ValueError("as_sparse requires a threshold")
+
+    queries = list(queries)
+    targets = queries if targets is None else list(targets)
+    workers = workers or os.cpu_count() or 1
+
+    vocab: Dict[Tuple[str, int], int] = {}
+    target_kmers = None
+    if threshold is not None:
+        target_kmers, vocab = kmer_matrix(targets, k)
+
+    tasks = [(start, queries[start:start + chunk_size], threshold, k)
+             for start in range(0, len(queries), chunk_size)]
+    init_args = (targets, k, vocab, target_kmers)
+
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker(*init_args)
+        results = [_score_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(_score_chunk, tasks))
+
+    shape = (len(queries), len(targets))
+    if threshold is None:
+        matrix = np.empty(shape, dtype=np.float32)
+        for start, scores in results:
+            matrix[start:start + scores.shape[0]] = scores
+        return matrix
+
+    rows = np.concatenate([r[1][0] for r in results]) if results else np.empty(0, dtype=np.int64)
+    cols = np.concatenate([r[1][1] for r in results]) if results else np.empty(0, dtype=np.int64)
+    vals = np.concatenate([r[1][2] for r in results]) if results else np.empty(0, dtype=np.float32)
+    matrix = sparse.csr_matrix((vals, (rows, cols)), shape=shape, dtype=np.float32)
+    return matrix if as_sparse else matrix.toarray()
+
+
+def similarity_to_reference(sequences: Sequence[str], reference: str) -> np.ndarray:
+    """
+    Similarity of each sequence to a single reference (e.g. the CAR-T target).
+
+    Args:
+        sequences: Antigen peptide sequences
+        reference: Reference peptide sequence
+
+    Returns:
+        Float32 vector of ``Levenshtein.ratio`` scores
+    """
+    return cdist(list(sequences), [reference], scorer=Indel.normalized_similarity,
+                 dtype=np.float32)[:, 0]
@@ -0,0 +1,293 @@
+"""
+Benchmark suite for the sequence, QC and single-cell hot paths.
+
+Every benchmark runs in a fresh interpreter so its peak RSS is its own.
+Each timed repeat is paired with a fixed calibration loop, and throughput
+is reported both raw and normalised by the calibration time (median over
+repeats), so the comparison against ``baselines.json`` tracks the code
+rather than how busy the machine is. A normalised throughput drop or RSS
+growth beyond the tolerance is reported as a regression (exit code 1).
+
+Usage:
+    python benchmarks/run_benchmarks.py                  # run all, compare
+    python benchmarks/run_benchmarks.py motif_find pca   # run a subset
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, "baselines.json")
+
+for path in (ROOT, os.path.join(ROOT, "QualityDecoder"), os.path.join(ROOT, "Single Cell"), BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from instrumentation import peak_rss_mb  # noqa: E402
+
+
+# ===================== BENCHMARKS =====================
+# Each setup function builds its inputs in ``workdir`` and returns the
+# timed callable plus the work units it processes per call.
+
+def setup_motif_read_fasta(scale: float, workdir: str) -> Tuple[Callable[[], Any], Dict[str, int]]:
+    import synthetic
+    from motif import read_fasta
+
+    n_bases = int(5_000_000 * scale)
+    path = synthetic.write_fasta(os.path.join(workdir, "synthetic.fa"), n_bases)
+    return lambda: read_fasta(path), {'bases': n_bases}
+
+
+def setup_motif_find(scale: float, workdir: str) -> Tuple[Callable[[], Any], Dict[str, int]]:
+    import synthetic
+    from motif import find_motifs
+
+    n_bases = int(5_000_000 * scale)
+    sequence = synthetic.mutated_sequence(n_bases)
+    return lambda: find_motifs(sequence, "TATA[AT]A[AT]"), {'bases': n_bases}
+
+
+def setup_parser_ops(scale: float, workdir: str) -> Tuple[Callable[[], Any], Dict[str, int]]:
+    import synthetic
+    from Bio import SeqIO
+    from Bio.SeqUtils import gc_fraction
+    from parser import load_records, reverse_complement_records
+
+    n_bases = int(5_000_000 * scale)
+    path = synthetic.write_fasta(os.path.join(workdir, "synthetic.fa"), n_bases)
+    out_path = os.path.join(workdir, "reverse.fasta")
+
+    def run():
+        # parser.py's pipeline without the console output: parse, GC, reverse complement, write
+        records = load_records(path)
+        for record in records:
+            gc_fraction(record.seq)
+        SeqIO.write(reverse_complement_records(records), out_path, "fasta")
+
+    return run, {'bases': n_bases}
+
+
+def setup_quality_convert(scale: float, workdir: str) -> Tuple[Callable[[], Any], Dict[str, int]]:
+    import synthetic
+    from fastq_converter import FastqConverter
+
+    n_reads = int(5_000 * scale)
+    qualities = synthetic.quality_strings(n_reads)
+    converter = FastqConverter()
+
+    def run():
+        for quality in qualities:
+            converter.convert_quality_string(quality)
+
+    return run, {'reads': n_reads, 'bases': sum(map(len, qualities))}
+
+
+def setup_quality_stats(scale: float, workdir: str) -> Tuple[Callable[[], Any], Dict[str, int]]:
+    import synthetic
+    from fastq_converter import FastqConverter
+
+    n_reads = int(2_000 * scale)
+    qualities = synthetic.quality_strings(n_reads)
+    converter = FastqConverter()
+
+    def run():
+        for quality in qualities:
+            converter.get_quality_statistics(quality)
+
+    return run, {'reads': n_reads, 'bases': sum(map(len, qualities))}
+
+
+def setup_pca(scale: float, workdir: str) -> Tuple[Callable[[], Any], Dict[str, int]]:
+    import synthetic
+    from reduction import ReductionStage
+    from result_cache import ResultCache
+
+    n_cells = int(5_000 * scale)
+    cells = synthetic.expression_matrix(n_cells, 2_000)
+    counter = iter(range(1_000_000))
+
+    def run():
+        # A fresh cache directory per call so the fit is never a cache hit
+        stage = ReductionStage(ResultCache(os.path.join(workdir, f"pca-{next(counter)}")))
+        stage.fit_pca(cells)
+
+    return run, {'cells': n_cells}
+
+
+def setup_umap(scale: float, workdir: str) -> Tuple[Callable[[], Any], Dict[str, int]]:
+    import synthetic
+    from reduction import ReductionStage
+    from result_cache import ResultCache
+
+    n_cells = int(1_000 * scale)
+    stage = ReductionStage(ResultCache(os.path.join(workdir, "pca")))
+    pcs = stage.fit_pca(synthetic.expression_matrix(n_cells, 2_000))
+    counter = iter(range(1_000_000))
+
+    # Compile UMAP's numba kernels outside the timed region
+    warm = ReductionStage(ResultCache(os.path.join(workdir, "warmup")))
+    warm.fit_umap(warm.fit_pca(synthetic.expression_matrix(200, 50)))
+
+    def run():
+        stage.result_cache = ResultCache(os.path.join(workdir, f"umap-{next(counter)}"))
+        stage.fit_umap(pcs)
+
+    return run, {'cells': n_cells}
+
+
+BENCHMARKS = {
+    'motif_read_fasta': setup_motif_read_fasta,
+    'motif_find': setup_motif_find,
+    'parser_ops': setup_parser_ops,
+    'quality_convert': setup_quality_convert,
+    'quality_stats': setup_quality_stats,
+    'pca': setup_pca,
+    'umap': setup_umap,
+}
+
+# Slow benchmarks get fewer repeats and no untimed warm-up call
+REPEATS = {'umap': 3, 'pca': 3}
+
+
+# ===================== RUNNER =====================
+def calibration_loop() -> None:
+    """Fixed mix of interpreter and NumPy work used as the unit of machine speed."""
+    total = 0
+    for i in range(300_000):
+        total += i % 7
+    values = np.random.default_rng(0).random(500_000)
+    np.sort(values)
+    values @ values
+
+
+def _timed(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run_one(name: str, scale: float, repeats: int) -> Dict[str, Any]:
+    """Run a single benchmark in this process and return its measurements."""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+        func, units = BENCHMARKS[name](scale, workdir)
+        if name not in REPEATS:
+            func()
+        calibration_loop()
+        # Interleave calibration and benchmark so both see the same machine load
+        pairs = [(_timed(calibration_loop), _timed(func)) for _ in range(repeats)]
+
+    seconds = statistics.median(bench for _, bench in pairs)
+    relative = statistics.median(bench / calib for calib, bench in pairs)
+    result = {
+        'seconds': seconds,
+        'calibration_s': statistics.median(calib for calib, _ in pairs),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    for unit, count in units.items():
+        result[f'{unit}_per_s'] = count / seconds
+        # Units processed per calibration-loop time: comparable across machine load
+        result[f'{unit}_per_cal'] = count / relative
+    return result
+
+
+def run_isolated(name: str, scale: float, repeats: int) -> Dict[str, Any]:
+    """Run a benchmark in a child interpreter so peak RSS is not shared."""
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", name,
+         "--scale", str(scale), "--repeats", str(repeats)],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(name: str, result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> list:
+    """Regression messages for one benchmark (empty if within tolerance)."""
+    problems = []
+    for key, value in result.items():
+        if key.endswith('_per_cal') and key in baseline:
+            if value < baseline[key] * (1 - tolerance):
+                problems.append(f"{name}: {key} {value:,.0f} < baseline {baseline[key]:,.0f}")
+    if 'peak_rss_mb' in baseline and result['peak_rss_mb'] > baseline['peak_rss_mb'] * (1 + tolerance):
+        problems.append(f"{name}: peak RSS {result['peak_rss_mb']:.1f} MB > "
+                        f"baseline {baseline['peak_rss_mb']:.1f} MB")
+    return problems
+
+
+def format_result(name: str, result: Dict[str, Any]) -> str:
+    if 'error' in result:
+        return f"{name:<18} ERROR {result['error']}"
+    rates = "  ".join(f"{v:>14,.0f} {k[:-6]}/s" for k, v in result.items() if k.endswith('_per_s'))
+    return f"{name:<18} {result['seconds']:>8.3f} s  {result['peak_rss_mb']:>8.1f} MB  {rates}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for input sizes")
+    parser.add_argument("--repeats", type=int, default=7, help="Timed repeats; the median is reported")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Allowed relative throughput drop / RSS growth before flagging")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to baselines.json")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_one(args.child, args.scale, args.repeats)))
+        return 0
+
+    names = args.names or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    stored = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r") as f:
+            stored = json.load(f)
+    baselines = stored.get('benchmarks', {})
+    if stored and stored.get('scale') != args.scale:
+        print(f"Note: baselines were recorded at scale {stored.get('scale')}, running at {args.scale}")
+
+    results, problems = {}, []
+    for name in names:
+        result = run_isolated(name, args.scale, min(args.repeats, REPEATS.get(name, args.repeats)))
+        results[name] = result
+        print(format_result(name, result), flush=True)
+        if 'error' not in result and name in baselines and stored.get('scale') == args.scale:
+            problems.extend(compare(name, result, baselines[name], args.tolerance))
+
+    if args.update_baseline:
+        baselines.update({n: r for n, r in results.items() if 'error' not in r})
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({'scale': args.scale, 'machine': platform.machine(),
+                       'python': platform.python_version(), 'benchmarks': baselines},
+                      f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baselines written to {BASELINE_PATH}")
+        return 0
+
+    if problems:
+        print("\nRegressions:")
+        for problem in problems:
+            print(f" - {problem}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
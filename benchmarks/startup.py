@@ -0,0 +1,96 @@
+"""
+Startup-time budget for the QC entry points and CLI scripts.
+
+Each entry is executed in a fresh interpreter; the best of ``--repeats``
+wall times, minus a bare ``python -c pass``, must stay within its budget,
+and the modules listed as forbidden must not be imported.
+
+Usage:
+    python benchmarks/startup.py
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (working directory, code run with -c, budget in seconds, modules that must stay unloaded)
+ENTRY_POINTS: Dict[str, Tuple[str, str, float, List[str]]] = {
+    'fastq_converter': (
+        "QualityDecoder", "import fastq_converter", 0.3,
+        ["pandas", "matplotlib", "plotly", "scipy"],
+    ),
+    'motif': (
+        ".", "import motif", 0.1,
+        ["numpy", "pandas"],
+    ),
+    'parser': (
+        ".", "import parser", 0.5,
+        ["pandas", "matplotlib"],
+    ),
+    'pdace --help': (
+        "Single Cell", "import sys; sys.argv = ['pdace.py', '--help']; import runpy; "
+                       "runpy.run_path('pdace.py', run_name='__main__')", 0.75,
+        ["matplotlib", "seaborn", "plotly", "joypy", "umap", "sklearn", "imageio"],
+    ),
+}
+
+
+def _time_command(code: str, cwd: str, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=cwd, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _loaded_modules(code: str, cwd: str, modules: List[str]) -> List[str]:
+    probe = (
+        "import sys, atexit\n"
+        f"atexit.register(lambda: print(','.join(m for m in {modules!r} if m in sys.modules), "
+        "file=sys.__stderr__))\n"
+        f"{code}\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", probe], cwd=cwd,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    last = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ""
+    return [m for m in last.split(",") if m]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check startup time budgets")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per entry point; the best is used")
+    args = parser.parse_args(argv)
+
+    interpreter = _time_command("pass", ROOT, args.repeats)
+    print(f"{'interpreter':<18} {interpreter:>7.3f} s")
+
+    failures = []
+    for name, (subdir, code, budget, forbidden) in ENTRY_POINTS.items():
+        cwd = os.path.join(ROOT, subdir)
+        elapsed = _time_command(code, cwd, args.repeats) - interpreter
+        loaded = _loaded_modules(code, cwd, forbidden)
+        status = "ok" if elapsed <= budget and not loaded else "OVER"
+        print(f"{name:<18} {elapsed:>7.3f} s  (budget {budget:.2f} s)  {status}"
+              + (f"  loads {', '.join(loaded)}" if loaded else ""))
+        if elapsed > budget:
+            failures.append(f"{name}: {elapsed:.3f} s > {budget:.2f} s")
+        if loaded:
+            failures.append(f"{name}: imports {', '.join(loaded)}")
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        for failure in failures:
+            print(f" - {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Synthetic inputs for the benchmark suite, scaled up from the repo's own data.
+
+- FASTA: ``BRCA1.fa`` tiled with random point mutations
+- FASTQ: reads sampled from BRCA1 with quality strings shaped like
+  ``rna_seq_project/data/*.fastq`` and ``sample_data.get_sample_fastq_entries``
+- Expression: the negative-binomial cells x genes model from ``pdace.py``
+"""
+
+import os
+import sys
+from typing import List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BRCA1_PATH = os.path.join(ROOT, "BRCA1.fa")
+FASTQ_DIR = os.path.join(ROOT, "rna_seq_project", "data")
+
+sys.path.insert(0, os.path.join(ROOT, "QualityDecoder"))
+from sample_data import get_sample_fastq_entries  # noqa: E402
+
+
+def _brca1_sequence() -> str:
+    with open(BRCA1_PATH, "r") as file:
+        return "".join(line.strip().upper() for line in file if not line.startswith(">"))
+
+
+def _fastq_quality_templates() -> List[str]:
+    """Quality strings from the repo's FASTQ files and the QualityDecoder samples."""
+    templates = []
+    for name in sorted(os.listdir(FASTQ_DIR)):
+        if name.endswith(".fastq"):
+            with open(os.path.join(FASTQ_DIR, name), "r") as file:
+                templates.extend(line.strip() for i, line in enumerate(file) if i % 4 == 3)
+    templates.extend(entry['quality_string'] for entry in get_sample_fastq_entries())
+    return [t for t in templates if t]
+
+
+def mutated_sequence(n_bases: int, seed: int = 0, mutation_rate: float = 0.01) -> str:
+    """BRCA1 tiled to ``n_bases`` with random substitutions so repeats are not identical."""
+    rng = np.random.default_rng(seed)
+    base = np.frombuffer(_brca1_sequence().encode("ascii"), dtype=np.uint8)
+    tiled = np.resize(base, n_bases).copy()
+    mutate = rng.random(n_bases) < mutation_rate
+    tiled[mutate] = rng.choice(np.frombuffer(b"ACGT", dtype=np.uint8), mutate.sum())
+    return tiled.tobytes().decode("ascii")
+
+
+def write_fasta(path: str, n_bases: int, seed: int = 0, line_width: int = 70) -> str:
+    """Write a single-record FASTA of ``n_bases`` bases and return its path."""
+    sequence = mutated_sequence(n_bases, seed)
+    with open(path, "w") as file:
+        file.write(f">synthetic_BRCA1 {n_bases} bp\n")
+        for i in range(0, len(sequence), line_width):
+            file.write(sequence[i:i + line_width] + "\n")
+    return path
+
+
+def quality_strings(n_reads: int, read_length: int = 58, seed: int = 0) -> List[str]:
+    """Quality strings of ``read_length`` built by tiling the repo's quality templates."""
+    rng = np.random.default_rng(seed)
+    templates = _fastq_quality_templates()
+    picks = rng.integers(len(templates), size=n_reads)
+    return [(templates[i] * (read_length // len(templates[i]) + 1))[:read_length] for i in picks]
+
+
+def reads(n_reads: int, read_length: int = 58, seed: int = 0) -> List[str]:
+    """Read sequences sampled from BRCA1."""
+    rng = np.random.default_rng(seed)
+    sequence = _brca1_sequence()
+    starts = rng.integers(len(sequence) - read_length, size=n_reads)
+    return [sequence[s:s + read_length] for s in starts]
+
+
+def write_fastq(path: str, n_reads: int, read_length: int = 58, seed: int = 0) -> str:
+    """Write a FASTQ file with reads and qualities from :func:`reads` / :func:`quality_strings`."""
+    with open(path, "w") as file:
+        for i, (seq, qual) in enumerate(zip(reads(n_reads, read_length, seed),
+                                            quality_strings(n_reads, read_length, seed))):
+            file.write(f"@SEQ_ID_{i + 1:07d}\n{seq}\n+\n{qual}\n")
+    return path
+
+
+def expression_matrix(n_cells: int, n_genes: int, seed: int = 42) -> np.ndarray:
+    """Cells x genes matrix following the ``pdace.py`` simulation."""
+    rng = np.random.default_rng(seed)
+    pseudotime = np.sort(rng.random(n_cells))
+    clones = rng.choice([0, 1, 2], size=n_cells, p=[0.5, 0.3, 0.2])
+    mutation_load = clones * rng.random(n_cells) * 3
+    expr = rng.negative_binomial(n=2, p=0.5, size=(n_cells, n_genes)).astype(np.float64)
+    expr += (pseudotime * 5)[:, None]
+    expr += mutation_load[:, None]
+    return expr
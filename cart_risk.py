@@ -0,0 +1,137 @@
+"""
+Vectorized Monte Carlo engine for the CAR-T off-target risk simulation.
+
+Each run draws gamma-distributed antigen expression for every tissue and
+scales it by the antigen's similarity to the CAR-T target. All runs are
+drawn as one ``(runs, antigens, tissues)`` block; when that block would
+exceed the memory budget it is drawn in run chunks and reduced to summary
+statistics on the fly.
+
+Every block of ``BLOCK_RUNS`` runs has its own random stream spawned from
+the seed, so results do not depend on the memory budget or thread count.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+RISK_BINS = (0, 1, 5, np.inf)
+RISK_LABELS = ('Low', 'Moderate', 'High')
+
+BLOCK_RUNS = 256
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def runs_per_chunk(n_antigens: int, n_tissues: int, max_bytes: int) -> int:
+    """Number of runs whose float32 risk cube fits in ``max_bytes`` (at least 1)."""
+    bytes_per_run = n_antigens * n_tissues * np.dtype(np.float32).itemsize
+    return max(1, max_bytes // max(bytes_per_run, 1))
+
+
+def simulate_risk(similarity: Sequence[float], n_tissues: int, n_runs: int = 100,
+                  shape: ArrayLike = 2.0, scale: ArrayLike = 5.0, seed: Optional[int] = 42,
+                  bins: Sequence[float] = RISK_BINS, labels: Sequence[str] = RISK_LABELS,
+                  max_bytes: int = 256 * 1024 ** 2, keep_runs: bool = False,
+                  workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Simulate off-target risk over many runs and summarise it.
+
+    Args:
+        similarity: Similarity of each antigen to the CAR-T target
+        n_tissues: Number of tissues in the panel
+        n_runs: Number of Monte Carlo runs
+        shape: Gamma shape, scalar or broadcastable to (antigens, tissues)
+        scale: Gamma scale, scalar or broadcastable to (antigens, tissues)
+        seed: Seed for the ``np.random.SeedSequence`` the block streams are spawned from
+        bins: Risk level bin edges
+        labels: Risk level names, one per bin
+        max_bytes: Memory budget for one block of simulated risk
+        keep_runs: Also return the full (runs, antigens, tissues) cube;
+            only allowed when it fits in ``max_bytes``
+        workers: Threads drawing random blocks in parallel (defaults to CPU count)
+
+    Returns:
+        Dictionary of (antigens, tissues) arrays: 'mean', 'std', 'min', 'max',
+        plus 'level_fractions' mapping each label to the fraction of runs in
+        that risk level, and 'runs' if requested
+    """
+    similarity = np.asarray(similarity, dtype=np.float32)
+    n_antigens = similarity.shape[0]
+    if len(labels) != len(bins) - 1:
+        raise ValueError("labels must have one entry per bin")
+
+    chunk = runs_per_chunk(n_antigens, n_tissues, max_bytes)
+    if keep_runs and chunk < n_runs:
+        raise ValueError("keep_runs requires the full risk cube to fit in max_bytes")
+
+    n_blocks = -(-n_runs // BLOCK_RUNS)
+    streams = [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(n_blocks)]
+    gamma_shape = np.broadcast_to(np.asarray(shape, dtype=np.float32), (n_antigens, n_tissues))
+    gamma_scale = np.broadcast_to(np.asarray(scale, dtype=np.float32), (n_antigens, n_tissues))
+    weight = similarity[None, :, None]
+    edges = np.asarray(bins, dtype=np.float32)
+
+    def draw(risk: np.ndarray, start: int, stop: int, offset: int) -> None:
+        # Runs [start, stop) lie inside one block, so they come from that block's stream
+        out = risk[start - offset:stop - offset]
+        streams[start // BLOCK_RUNS].standard_gamma(gamma_shape, size=out.shape,
+                                                    dtype=np.float32, out=out)
+        out *= gamma_scale
+        out *= weight
+
+    count = 0
+    mean = np.zeros((n_antigens, n_tissues))
+    m2 = np.zeros((n_antigens, n_tissues))
+    low = np.full((n_antigens, n_tissues), np.inf, dtype=np.float32)
+    high = np.full((n_antigens, n_tissues), -np.inf, dtype=np.float32)
+    level_counts = np.zeros((len(labels), n_antigens, n_tissues), dtype=np.int64)
+    runs = None
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for start in range(0, n_runs, chunk):
+            size = min(chunk, n_runs - start)
+            stop = start + size
+            risk = np.empty((size, n_antigens, n_tissues), dtype=np.float32)
+            first_boundary = -(-start // BLOCK_RUNS) * BLOCK_RUNS
+            bounds = sorted({start, stop} | set(range(first_boundary, stop, BLOCK_RUNS)))
+            list(pool.map(lambda seg: draw(risk, seg[0], seg[1], start), zip(bounds, bounds[1:])))
+
+            # Chan et al. parallel update of mean and sum of squared deviations
+            chunk_mean = risk.mean(axis=0, dtype=np.float64)
+            chunk_m2 = ((risk - chunk_mean) ** 2).sum(axis=0)
+            delta = chunk_mean - mean
+            total = count + size
+            mean += delta * size / total
+            m2 += chunk_m2 + delta ** 2 * count * size / total
+            count = total
+
+            np.minimum(low, risk.min(axis=0), out=low)
+            np.maximum(high, risk.max(axis=0), out=high)
+
+            # Bins are right-inclusive like pd.cut: count values above each edge, then difference
+            above = np.stack([np.count_nonzero(risk > edge, axis=0) for edge in edges])
+            level_counts += above[:-1] - above[1:]
+
+            if keep_runs:
+                runs = risk
+
+    summary = {
+        'mean': mean.astype(np.float32),
+        'std': np.sqrt(m2 / count).astype(np.float32) if count else m2.astype(np.float32),
+        'min': low,
+        'max': high,
+        'level_fractions': {label: level_counts[i] / max(count, 1) for i, label in enumerate(labels)},
+    }
+    if keep_runs:
+        summary['runs'] = runs
+    return summary
+
+
+def classify_mean_risk(mean: np.ndarray, bins: Sequence[float] = RISK_BINS,
+                       labels: Sequence[str] = RISK_LABELS) -> np.ndarray:
+    """Classify a mean risk matrix into risk levels (same bins as the notebook's ``pd.cut``)."""
+    level = np.searchsorted(np.asarray(bins), mean, side='left') - 1
+    names = np.array(list(labels) + [''], dtype=object)
+    return names[np.where((level >= 0) & (level < len(labels)), level, len(labels))]
@@ -0,0 +1,214 @@
+"""
+Lightweight run instrumentation: per-stage timers, counters and peak memory.
+
+Code under measurement calls ``get_recorder()`` and wraps its stages in
+``recorder.stage(name)``; counters are bumped with ``recorder.count``.
+Outside of :func:`recording` the active recorder is a no-op object, so the
+hooks cost one attribute lookup and an empty context manager.
+
+    with recording(metrics_path="metrics.json", profile_path="run.prof"):
+        sequence = read_fasta("BRCA1.fa")
+
+The metrics file is JSON. The profile is a ``cProfile`` dump that can be
+opened with ``pstats``, ``snakeviz`` or turned into a flamegraph with
+``flameprof`` / ``gprof2dot``. Setting ``PIPELINE_METRICS`` /
+``PIPELINE_PROFILE`` enables the same outputs without code changes.
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, memory is reported as 0
+    resource = None
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (peak RSS where unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (0 where unavailable)."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+class NullRecorder:
+    """
+    Recorder used while instrumentation is disabled; every hook is a no-op.
+    """
+
+    enabled = False
+    _null_stage = contextlib.nullcontext()
+
+    def stage(self, name: str):
+        return self._null_stage
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+
+class Recorder:
+    """
+    Collects stage timings, counters and sampled peak RSS for one run.
+    """
+
+    enabled = True
+
+    def __init__(self, sample_interval: Optional[float] = 0.05):
+        """
+        Initialize the recorder.
+
+        Args:
+            sample_interval: Seconds between RSS samples taken by a background
+                thread, or ``None`` to disable memory sampling
+        """
+        self.sample_interval = sample_interval
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {}
+        self._open: Dict[str, int] = {}
+        self._started = time.perf_counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    # ===================== HOOKS =====================
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a stage; repeated calls with the same name are aggregated."""
+        entry = self.stages.get(name)
+        if entry is None:
+            # Seed the peak with one sample so stages shorter than the interval still get one
+            rss = current_rss_mb() if self.sample_interval is not None else None
+            entry = self.stages[name] = {'calls': 0, 'total_s': 0.0, 'max_s': 0.0,
+                                         'peak_rss_mb': rss}
+        self._open[name] = self._open.get(name, 0) + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._open[name] -= 1
+            entry['calls'] += 1
+            entry['total_s'] += elapsed
+            if elapsed > entry['max_s']:
+                entry['max_s'] = elapsed
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add ``n`` to counter ``name`` (records, bases, cells, ...)."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    # ===================== MEMORY SAMPLING =====================
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        rss = current_rss_mb()
+        for name, depth in list(self._open.items()):
+            if depth:
+                entry = self.stages[name]
+                if entry['peak_rss_mb'] is None or rss > entry['peak_rss_mb']:
+                    entry['peak_rss_mb'] = rss
+
+    def start(self) -> None:
+        """Start the memory sampler."""
+        if self.sample_interval is not None and self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop the memory sampler."""
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    # ===================== OUTPUT =====================
+    def to_dict(self) -> Dict[str, Any]:
+        """Metrics as a JSON-serialisable dictionary."""
+        wall = time.perf_counter() - self._started
+        stages = {}
+        for name, entry in self.stages.items():
+            stages[name] = dict(entry)
+            stages[name]['mean_s'] = entry['total_s'] / entry['calls'] if entry['calls'] else 0.0
+        return {
+            'wall_s': wall,
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': stages,
+            'counters': dict(self.counters),
+        }
+
+    def write_json(self, path: str) -> None:
+        """Write :meth:`to_dict` to ``path``."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+
+_NULL = NullRecorder()
+_active: Any = _NULL
+
+
+def get_recorder():
+    """The active recorder (a no-op :class:`NullRecorder` outside of :func:`recording`)."""
+    return _active
+
+
+@contextlib.contextmanager
+def recording(metrics_path: Optional[str] = None, profile_path: Optional[str] = None,
+              sample_interval: Optional[float] = 0.05) -> Iterator[Any]:
+    """
+    Enable instrumentation for the enclosed block.
+
+    With neither path given, ``PIPELINE_METRICS`` and ``PIPELINE_PROFILE``
+    are read from the environment; if those are unset too, the block runs
+    with the no-op recorder.
+
+    Args:
+        metrics_path: Where to write the JSON metrics on exit
+        profile_path: Where to write a cProfile dump on exit
+        sample_interval: Seconds between RSS samples (``None`` to disable)
+
+    Yields:
+        The active recorder
+    """
+    global _active
+
+    if metrics_path is None and profile_path is None:
+        metrics_path = os.environ.get("PIPELINE_METRICS") or None
+        profile_path = os.environ.get("PIPELINE_PROFILE") or None
+    if metrics_path is None and profile_path is None:
+        yield _NULL
+        return
+
+    recorder = Recorder(sample_interval=sample_interval)
+    profiler = cProfile.Profile() if profile_path else None
+    previous, _active = _active, recorder
+    recorder.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield recorder
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        recorder.stop()
+        _active = previous
+        if metrics_path:
+            recorder.write_json(metrics_path)
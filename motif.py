@@ -1,34 +1,65 @@
 import re
 
+from instrumentation import get_recorder, recording
+
 def read_fasta(filepath):
     """Reads the first sequence from a FASTA file and returns it as a string."""
+    recorder = get_recorder()
     sequence = ""
-    with open(filepath, "r") as file:
-        for line in file:
-            if line.startswith(">"):
-                continue  # Skip header
-            sequence += line.strip().upper()
+    with recorder.stage("read_fasta"):
+        with open(filepath, "r") as file:
+            for line in file:
+                if line.startswith(">"):
+                    continue  # Skip header
+                sequence += line.strip().upper()
+    recorder.count("fasta_bases", len(sequence))
     return sequence
 
 def find_motifs(sequence, motif_pattern="TATA[AT]A[AT]"):
     """Finds motif matches using regex and returns positions + sequences."""
+    recorder = get_recorder()
     matches = []
-    for match in re.finditer(motif_pattern, sequence):
-        matches.append({
-            'position': match.start(),
-            'match': match.group()
-        })
+    with recorder.stage("find_motifs"):
+        for match in re.finditer(motif_pattern, sequence):
+            matches.append({
+                'position': match.start(),
+                'match': match.group()
+            })
+    recorder.count("motif_bases_scanned", len(sequence))
+    recorder.count("motif_hits", len(matches))
     return matches
 
+def find_motifs_in_file(filepath, motif_pattern="TATA[AT]A[AT]", cache=None):
+    """Finds motif matches in a FASTA file, reusing hits stored in ``cache`` (a ResultCache) if given."""
+    if cache is None:
+        return find_motifs(read_fasta(filepath), motif_pattern)
+
+    import numpy as np
+
+    def compute():
+        matches = find_motifs(read_fasta(filepath), motif_pattern)
+        return {
+            'position': np.array([m['position'] for m in matches], dtype=np.int64),
+            'match': np.array([m['match'] for m in matches], dtype=str),
+        }
+
+    hits = cache.get_or_compute("motif.find_motifs", compute,
+                                params={'pattern': motif_pattern}, inputs=[filepath])
+    return [{'position': int(p), 'match': str(m)} for p, m in zip(hits['position'], hits['match'])]
+
 # === Main execution ===
 if __name__ == "__main__":
     fasta_path = "BRCA1.fa"  # Replace with your actual file name
-    dna_sequence = read_fasta(fasta_path)
-    
-    # Define motif pattern: TATA box
-    motif_regex = "TATA[AT]A[AT]"
-    
-    results = find_motifs(dna_sequence, motif_regex)
+
+    from result_cache import ResultCache
+
+    # Metrics / profile are written when PIPELINE_METRICS / PIPELINE_PROFILE are set
+    with recording():
+        # Define motif pattern: TATA box
+        motif_regex = "TATA[AT]A[AT]"
+
+        # Hits are reused across runs until the FASTA file or pattern changes
+        results = find_motifs_in_file(fasta_path, motif_regex, cache=ResultCache("result_cache"))
 
     if results:
         print(f"Found {len(results)} motif(s):")
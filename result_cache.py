@@ -0,0 +1,418 @@
+"""
+Persistent, content-addressed result cache shared by the analysis scripts.
+
+An entry is keyed by the content hash of its input files and arrays, the
+name of the computation and its parameters, so the same result is reused
+by any run or process that asks for it. Each entry is a directory:
+
+- NumPy arrays are stored as ``.npy`` and loaded memory-mapped
+- DataFrames are stored as record ``.npy`` files, index included
+- Values that survive a JSON round trip unchanged as ``.json``
+- Anything else (object arrays holding non-strings, tuples, dicts with
+  non-string keys, DataFrames with extension dtypes, ...) with joblib
+
+A dict result is split into one file per value only when every key is a
+plain identifier; otherwise it is stored as a single value.
+
+Entries are written to a temporary directory and renamed into place, so
+readers never see partial results and concurrent writers of the same key
+cannot corrupt each other. A lock (one of ``LOCK_STRIPES`` files shared by
+all keys) stops two processes computing the same result at once, and
+least-recently-used entries are evicted once the cache grows past its size
+limit.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, atomic renames still apply
+    fcntl = None
+
+MANIFEST_NAME = "manifest.json"
+# Dict keys that can safely become file names inside an entry
+_ITEM_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Marks a cache miss, so that ``None`` is a cacheable result
+_MISSING = object()
+# Keys share a fixed set of lock files instead of one file per key
+LOCK_STRIPES = 64
+
+
+def file_hash(filepath: str, block_size: int = 1 << 20) -> str:
+    """Content hash of a file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _update_array(digest: Any, array: np.ndarray) -> None:
+    array = np.ascontiguousarray(array)
+    digest.update(f"{array.dtype}{array.shape}".encode())
+    if array.dtype != object:
+        digest.update(array.tobytes())
+        return
+    # The bytes of an object array are pointers, which differ between processes
+    try:
+        digest.update(json.dumps(array.tolist()).encode())
+    except TypeError:
+        raise TypeError("object arrays can only be hashed when they hold strings, numbers, "
+                        "booleans or None") from None
+
+
+def data_hash(*values: Any) -> str:
+    """Content hash of arrays, DataFrames, Series or JSON-serialisable values."""
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        if hasattr(value, "to_numpy") and hasattr(value, "columns"):  # DataFrame
+            index = value.index
+            digest.update(json.dumps([[str(c) for c in value.columns],
+                                      [str(n) for n in index.names]]).encode())
+            for level in range(index.nlevels):
+                _update_array(digest, index.get_level_values(level).to_numpy())
+            block = value.to_numpy()
+            if block.dtype != object:
+                _update_array(digest, block)
+            else:
+                # Mixed or string columns: hash column by column so numbers stay binary
+                for i in range(value.shape[1]):
+                    _update_array(digest, value.iloc[:, i].to_numpy())
+        elif hasattr(value, "to_numpy"):  # Series, Index
+            _update_array(digest, value.to_numpy())
+        elif isinstance(value, np.ndarray):
+            _update_array(digest, value)
+        else:
+            digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _split_items(value: Any) -> bool:
+    """Whether a dict result can be stored as one file per value."""
+    if not isinstance(value, dict):
+        return False
+    keys = list(value)
+    return (all(isinstance(k, str) and _ITEM_NAME.match(k) and k != "manifest" for k in keys)
+            # Case-insensitive file systems would merge "A" and "a"
+            and len({k.lower() for k in keys}) == len(keys))
+
+
+def _str_array(array: np.ndarray) -> Optional[np.ndarray]:
+    """Fixed-width string copy of an object array, or ``None`` if it holds non-strings."""
+    if array.dtype != object:
+        return array
+    if not all(isinstance(v, str) for v in array.flat):
+        return None
+    return array.astype(str)
+
+
+def _table_fields(frame: Any) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, str]]]:
+    """
+    Record fields for a DataFrame, or ``None`` if a record file would lose information.
+
+    A non-default index is stored as leading ``__index_<level>__`` fields.
+    String columns are stored fixed-width; their pandas dtype (``object``,
+    ``str``, ``string``) is returned alongside so it can be restored.
+    """
+    import pandas as pd
+
+    columns = frame.columns
+    if (isinstance(columns, pd.MultiIndex) or columns.name is not None or not columns.is_unique
+            or not all(isinstance(c, str) for c in columns)):
+        return None
+    index = frame.index
+    if not all(n is None or isinstance(n, str) for n in index.names):
+        return None
+    series = []
+    if not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1):
+        series += [(f"__index_{i}__", index.get_level_values(i)) for i in range(index.nlevels)]
+    series += [(c, frame[c]) for c in columns]
+
+    fields, strings = {}, {}
+    for name, values in series:
+        if isinstance(values.dtype, pd.StringDtype):
+            if values.isna().any():
+                return None
+            array = values.to_numpy().astype(str)
+            strings[name] = str(values.dtype)
+        elif isinstance(values.dtype, np.dtype):
+            array = _str_array(values.to_numpy())
+            if array is None:
+                return None
+            if values.dtype == object:
+                strings[name] = "object"
+        else:  # categorical, nullable integers, tz-aware datetimes, ...
+            return None
+        fields[name] = array
+    if not fields or len(fields) != len(series):
+        return None
+    return fields, strings
+
+
+class ResultCache:
+    """
+    On-disk store of computed results with LRU eviction.
+    """
+
+    def __init__(self, cache_dir: str = "result_cache", max_bytes: Optional[int] = 2 << 30):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding one sub-directory per entry
+            max_bytes: Size limit enforced by LRU eviction, or ``None`` for no limit
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._file_hashes: Dict[tuple, str] = {}
+        self._held = threading.local()
+
+    # ===================== KEYS =====================
+    def _input_hash(self, path: str) -> str:
+        # Hashing large FASTQ/FASTA files is the costly part of a lookup; reuse it within a process
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._file_hashes:
+            self._file_hashes[memo_key] = file_hash(path)
+        return self._file_hashes[memo_key]
+
+    def make_key(self, name: str, params: Optional[Dict[str, Any]] = None,
+                 inputs: Sequence[str] = (), data: Sequence[Any] = ()) -> str:
+        """
+        Cache key for a computation.
+
+        Args:
+            name: Name of the computation (e.g. ``"motif.find_motifs"``)
+            params: Parameters that change the result
+            inputs: Input file paths, keyed by content rather than path
+            data: In-memory inputs (arrays, DataFrames, JSON values)
+
+        Returns:
+            Hex digest identifying the entry
+        """
+        return data_hash(name, params or {}, [self._input_hash(p) for p in inputs], *data)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    # ===================== LOCKING =====================
+    @contextlib.contextmanager
+    def _lock(self, name: str) -> Iterator[None]:
+        held = self._held.__dict__.setdefault('names', set())
+        if name in held:
+            # A compute nested in another on the same stripe: flock would block on ourselves
+            yield
+            return
+        lock_dir = os.path.join(self.cache_dir, ".locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(os.path.join(lock_dir, name), "a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            held.add(name)
+            try:
+                yield
+            finally:
+                held.discard(name)
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _key_lock(self, key: str) -> contextlib.AbstractContextManager:
+        # Striped so the lock directory stays bounded however many keys are used
+        return self._lock(f"stripe-{int(key[:8], 16) % LOCK_STRIPES:02d}")
+
+    # ===================== READ / WRITE =====================
+    def load(self, key: str, default: Any = None) -> Any:
+        """
+        Load an entry, or return ``default`` if it is not cached.
+
+        Arrays come back memory-mapped (read-only). Loading marks the entry
+        as recently used.
+        """
+        entry = self._entry_path(key)
+        manifest_path = os.path.join(entry, MANIFEST_NAME)
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+            values = {item: self._read_item(entry, item, spec)
+                      for item, spec in manifest['items'].items()}
+            os.utime(manifest_path)
+        except FileNotFoundError:
+            # Missing, or evicted by another process while being read
+            return default
+        return values['value'] if manifest['single'] else values
+
+    def store(self, key: str, name: str, value: Any) -> None:
+        """
+        Atomically write an entry.
+
+        Args:
+            key: Entry key from :meth:`make_key`
+            name: Computation name, kept in the manifest for inspection
+            value: A single value, or a dict of named values stored side by side
+        """
+        single = not _split_items(value)
+        values = {'value': value} if single else value
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = os.path.join(self.cache_dir, f".tmp-{key}-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(tmp)
+        try:
+            items = {item: self._write_item(tmp, item, v) for item, v in values.items()}
+            size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+            with open(os.path.join(tmp, MANIFEST_NAME), "w") as f:
+                json.dump({'name': name, 'single': single, 'items': items, 'bytes': size}, f)
+            try:
+                os.rename(tmp, self._entry_path(key))
+            except OSError:
+                # Another writer stored the same key first; its result is identical
+                shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def _write_item(directory: str, item: str, value: Any) -> Dict[str, Any]:
+        path = os.path.join(directory, item)
+        if isinstance(value, np.ndarray):
+            array = _str_array(value)
+            if array is not None:
+                np.save(path + ".npy", array)
+                return {'kind': "array"}
+        elif hasattr(value, "to_records") and hasattr(value, "columns"):  # DataFrame
+            table = _table_fields(value)
+            if table is not None:
+                fields, strings = table
+                np.save(path + ".npy", np.rec.fromarrays(list(fields.values()), names=list(fields)))
+                n_index = len(fields) - len(value.columns)
+                return {'kind': "table", 'strings': strings,
+                        'index': list(value.index.names) if n_index else None}
+        else:
+            try:
+                text = json.dumps(value)
+            except (TypeError, ValueError):
+                text = None
+            # Tuples, non-string keys and NaN do not come back from JSON as they went in
+            if text is not None and json.loads(text) == value:
+                with open(path + ".json", "w") as f:
+                    f.write(text)
+                return {'kind': "json"}
+        import joblib
+
+        joblib.dump(value, path + ".joblib")
+        return {'kind': "joblib"}
+
+    @staticmethod
+    def _read_item(directory: str, item: str, spec: Dict[str, Any]) -> Any:
+        path = os.path.join(directory, item)
+        kind = spec['kind']
+        if kind == "array":
+            return np.load(path + ".npy", mmap_mode='r')
+        if kind == "table":
+            import pandas as pd
+
+            frame = pd.DataFrame(np.load(path + ".npy", mmap_mode='r')).astype(spec['strings'])
+            if spec['index'] is not None:
+                levels = [f"__index_{i}__" for i in range(len(spec['index']))]
+                frame = frame.set_index(levels)
+                frame.index.names = spec['index']
+            return frame
+        if kind == "json":
+            with open(path + ".json", "r") as f:
+                return json.load(f)
+        import joblib
+
+        return joblib.load(path + ".joblib")
+
+    def get_or_compute(self, name: str, compute: Callable[[], Any],
+                       params: Optional[Dict[str, Any]] = None, inputs: Sequence[str] = (),
+                       data: Sequence[Any] = ()) -> Any:
+        """
+        Return the cached result of ``compute`` or run it and store the result.
+
+        Args:
+            name: Name of the computation
+            compute: Function producing the result (a value or dict of values)
+            params: Parameters that change the result
+            inputs: Input file paths
+            data: In-memory inputs
+
+        Returns:
+            The cached or freshly computed result
+        """
+        key = self.make_key(name, params, inputs, data)
+        value = self.load(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        # Only one process computes a given key; the others wait and then load it
+        with self._key_lock(key):
+            value = self.load(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            value = compute()
+            self.store(key, name, value)
+        self.evict()
+        return value
+
+    # ===================== EVICTION =====================
+    def _entries(self) -> Iterator[tuple]:
+        """(last used, bytes, key) of every complete entry."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for key in os.listdir(self.cache_dir):
+            if key.startswith("."):
+                continue
+            manifest_path = os.path.join(self.cache_dir, key, MANIFEST_NAME)
+            try:
+                with open(manifest_path, "r") as f:
+                    size = json.load(f)['bytes']
+                yield os.path.getmtime(manifest_path), size, key
+            except (FileNotFoundError, ValueError, KeyError):
+                continue
+
+    def size_bytes(self) -> int:
+        """Total size of all cached entries."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Remove least-recently-used entries until the cache fits ``max_bytes``."""
+        if self.max_bytes is None:
+            return
+        with self._lock(".evict"):
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, key in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(key)
+                total -= size
+
+    def _remove(self, key: str) -> None:
+        # Rename first so the entry disappears atomically; open memmaps stay valid on POSIX
+        trash = os.path.join(self.cache_dir, f".trash-{key}-{uuid.uuid4().hex[:8]}")
+        try:
+            os.rename(self._entry_path(key), trash)
+        except OSError:
+            return
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock(".evict"):
+            for _, _, key in list(self._entries()):
+                self._remove(key)
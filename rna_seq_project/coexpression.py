@@ -0,0 +1,143 @@
+"""
+Gene co-expression network construction.
+
+Pearson correlations are computed as blocked matrix products over
+standardized float32 data, so the full genes x genes matrix never exists.
+Each block keeps only edges above a correlation threshold and/or the top-k
+partners per gene in a sparse adjacency matrix; ``networkx`` is only used
+for the final export.
+"""
+
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def standardize(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale each gene (row) so that ``Z @ Z.T`` is the Pearson correlation matrix.
+
+    Genes with zero variance become all-zero rows and get no edges.
+
+    Args:
+        matrix: Expression matrix of shape (genes, samples)
+
+    Returns:
+        Float32 matrix of the same shape
+    """
+    values = np.asarray(matrix, dtype=np.float32)
+    centered = values - values.mean(axis=1, keepdims=True, dtype=np.float64).astype(np.float32)
+    norms = np.linalg.norm(centered, axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(norms > 0, centered / norms, 0)
+    return z.astype(np.float32)
+
+
+def coexpression_adjacency(matrix: np.ndarray, threshold: Optional[float] = 0.8,
+                           top_k: Optional[int] = None, absolute: bool = True,
+                           block_size: int = 1024) -> sparse.csr_matrix:
+    """
+    Sparse, symmetric co-expression adjacency matrix.
+
+    Args:
+        matrix: Expression matrix of shape (genes, samples)
+        threshold: Keep pairs with correlation at least this strong
+        top_k: Keep each gene's ``top_k`` strongest partners (combined with
+            ``threshold`` when both are given)
+        absolute: Rank and threshold by ``|r|`` so negative correlations count
+        block_size: Genes correlated against all others per matrix product
+
+    Returns:
+        CSR matrix of shape (genes, genes) holding the kept correlations
+    """
+    if threshold is None and top_k is None:
+        raise ValueError("Give a threshold, top_k or both to keep the network sparse")
+
+    z = standardize(matrix)
+    n_genes = z.shape[0]
+    rows, cols, vals = [], [], []
+
+    for start in range(0, n_genes, block_size):
+        stop = min(start + block_size, n_genes)
+        corr = z[start:stop] @ z.T
+        corr[np.arange(stop - start), np.arange(start, stop)] = 0  # no self-loops
+        strength = np.abs(corr) if absolute else corr
+
+        if top_k is not None and top_k < n_genes:
+            partners = np.argpartition(-strength, top_k - 1, axis=1)[:, :top_k]
+            keep = np.zeros(strength.shape, dtype=bool)
+            np.put_along_axis(keep, partners, True, axis=1)
+            if threshold is not None:
+                keep &= strength >= threshold
+        else:
+            keep = strength >= threshold if threshold is not None else np.ones(strength.shape, bool)
+        keep &= strength > 0
+
+        r, c = np.nonzero(keep)
+        rows.append(r + start)
+        cols.append(c)
+        vals.append(corr[r, c])
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+    vals = np.clip(np.concatenate(vals), -1, 1).astype(np.float32) if vals else np.empty(0, dtype=np.float32)
+
+    # Top-k selections are one-sided; keep an edge if either gene chose it
+    return _symmetric_union(rows, cols, vals, n_genes)
+
+
+def _symmetric_union(rows: np.ndarray, cols: np.ndarray, vals: np.ndarray,
+                     n_genes: int) -> sparse.csr_matrix:
+    """CSR matrix of the edges plus their mirror images, each pair stored once per direction."""
+    all_rows = np.concatenate([rows, cols]).astype(np.int64)
+    all_cols = np.concatenate([cols, rows]).astype(np.int64)
+    all_vals = np.concatenate([vals, vals])
+    # Correlations are symmetric, so duplicate (i, j) entries carry the same value
+    first = np.unique(all_rows * n_genes + all_cols, return_index=True)[1]
+    return sparse.csr_matrix((all_vals[first], (all_rows[first], all_cols[first])),
+                             shape=(n_genes, n_genes))
+
+
+def to_networkx(adjacency: sparse.spmatrix, gene_names: Optional[Sequence[str]] = None):
+    """
+    Export an adjacency matrix to an undirected ``networkx.Graph``.
+
+    Args:
+        adjacency: Symmetric sparse adjacency from :func:`coexpression_adjacency`
+        gene_names: Node labels (defaults to row indices)
+
+    Returns:
+        Graph with a ``weight`` attribute holding the correlation
+    """
+    import networkx as nx
+
+    upper = sparse.triu(adjacency, k=1).tocoo()
+    graph = nx.Graph()
+    labels = list(gene_names) if gene_names is not None else list(range(adjacency.shape[0]))
+    graph.add_nodes_from(labels)
+    graph.add_weighted_edges_from(
+        (labels[i], labels[j], float(w)) for i, j, w in zip(upper.row, upper.col, upper.data)
+    )
+    return graph
+
+
+def build_network(expression: Union[pd.DataFrame, np.ndarray], threshold: Optional[float] = 0.8,
+                  top_k: Optional[int] = None, absolute: bool = True, block_size: int = 1024):
+    """
+    Co-expression network from a genes x samples expression table.
+
+    Args:
+        expression: Expression table with genes as rows
+        threshold: Minimum correlation strength for an edge
+        top_k: Strongest partners kept per gene
+        absolute: Use ``|r|`` for thresholding and ranking
+        block_size: Genes per blocked matrix product
+
+    Returns:
+        ``networkx.Graph`` with genes as nodes and correlations as edge weights
+    """
+    names = list(expression.index) if isinstance(expression, pd.DataFrame) else None
+    adjacency = coexpression_adjacency(np.asarray(expression), threshold, top_k, absolute, block_size)
+    return to_networkx(adjacency, names)
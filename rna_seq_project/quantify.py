@@ -0,0 +1,510 @@
+"""
+Alignment-free pseudo-counting quantifier (Salmon/Kallisto-style).
+
+Builds a k-mer -> transcript index from a FASTA transcriptome, maps FASTQ
+reads by k-mer lookup and reports per-gene read counts.
+
+K-mers are stored as canonical 2-bit codes in a sorted ``uint64`` array;
+each k-mer points to an equivalence class (the set of transcripts that
+contain it). Transcript ``t`` is its own singleton class ``t``, so only
+k-mers shared between transcripts need extra storage. A saved index is a
+directory of ``.npy`` files that is memory-mapped on load.
+"""
+
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+MAX_K = 31
+# Transcript bases encoded per step while building an index
+BUILD_BATCH_BASES = 1 << 20
+
+_BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for _code, _base in enumerate(b"ACGT"):
+    _BASE_CODES[_base] = _code
+    _BASE_CODES[ord(chr(_base).lower())] = _code
+
+# Index used by read-mapping worker processes
+_worker_index = None
+
+
+# ===================== INPUT PARSING =====================
+def read_fasta_records(filepath: str) -> Iterator[Tuple[str, str]]:
+    """Yields (header, sequence) for every record of a FASTA file."""
+    header = None
+    chunks: List[str] = []
+    with open(filepath, "r") as file:
+        for line in file:
+            if line.startswith(">"):
+                if header is not None:
+                    yield header, "".join(chunks)
+                header = line[1:].strip()
+                chunks = []
+            else:
+                chunks.append(line.strip().upper())
+    if header is not None:
+        yield header, "".join(chunks)
+
+
+def read_fastq_batches(filepath: str, batch_size: int = 100_000) -> Iterator[List[str]]:
+    """Streams the sequence lines of a FASTQ file in batches of ``batch_size`` reads."""
+    batch = []
+    with open(filepath, "r") as file:
+        for i, line in enumerate(file):
+            if i % 4 == 1:
+                batch.append(line.strip())
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def gene_from_header(header: str) -> str:
+    """
+    Gene name for a transcript header.
+
+    Uses the Ensembl ``gene_symbol:`` or ``gene:`` field when present and
+    falls back to the transcript ID otherwise.
+    """
+    fields = header.split()
+    for prefix in ("gene_symbol:", "gene:"):
+        for field in fields[1:]:
+            if field.startswith(prefix):
+                return field[len(prefix):]
+    return fields[0] if fields else header
+
+
+# ===================== K-MER ENCODING =====================
+def encode_kmers(sequences: Sequence[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Canonical 2-bit codes of every k-mer in a batch of sequences.
+
+    K-mers containing non-ACGT characters or spanning two sequences are
+    skipped.
+
+    Args:
+        sequences: DNA sequences
+        k: K-mer length (at most 31)
+
+    Returns:
+        Tuple of (uint64 canonical k-mer codes, index of the source sequence)
+    """
+    if not 0 < k <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}")
+
+    lengths = np.fromiter((len(s) for s in sequences), dtype=np.int64, count=len(sequences))
+    values = _BASE_CODES[np.frombuffer("".join(sequences).encode("ascii"), dtype=np.uint8)]
+    n_windows = values.size - k + 1
+    if n_windows <= 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+    source = np.repeat(np.arange(len(sequences)), lengths)[:n_windows]
+    ends = np.cumsum(lengths)
+    invalid = np.concatenate([[0], np.cumsum(values == 4)])
+    valid = (invalid[k:] - invalid[:-k] == 0) & (np.arange(n_windows) + k <= ends[source])
+
+    forward = np.zeros(n_windows, dtype=np.uint64)
+    reverse = np.zeros(n_windows, dtype=np.uint64)
+    bases = values.astype(np.uint64)
+    complements = (3 - values.astype(np.int64)).astype(np.uint64) & np.uint64(3)
+    for j in range(k):
+        forward = (forward << np.uint64(2)) | bases[j:j + n_windows]
+        reverse |= complements[j:j + n_windows] << np.uint64(2 * j)
+
+    return np.minimum(forward, reverse)[valid], source[valid]
+
+
+# ===================== INDEX =====================
+def _segment_positions(starts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Concatenated ``range(start, start + size)`` for every segment."""
+    offsets = np.cumsum(sizes) - sizes
+    return np.repeat(starts - offsets, sizes) + np.arange(int(sizes.sum()))
+
+
+def _shared_classes(owners: np.ndarray, starts: np.ndarray, sizes: np.ndarray,
+                    n_transcripts: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Group k-mers shared by several transcripts into equivalence classes.
+
+    Args:
+        owners: Transcript of every (k-mer, transcript) pair, sorted by
+            k-mer then transcript
+        starts: Offset of each shared k-mer's run in ``owners``
+        sizes: Length of each run (number of transcripts, at least 2)
+        n_transcripts: Number of transcripts; shared classes are numbered
+            after the singleton classes, in order of first k-mer
+
+    Returns:
+        Tuple of (class of each shared k-mer, class CSR offsets, class transcripts)
+    """
+    if starts.size == 0:
+        return (np.empty(0, dtype=np.int32), np.zeros(1, dtype=np.int64),
+                np.empty(0, dtype=np.int32))
+    members = owners[_segment_positions(starts, sizes)]
+    run_starts = np.cumsum(sizes) - sizes
+
+    # Identical member sets get identical sums of random per-transcript weights; the
+    # grouping is then checked member by member and redone on a (vanishingly rare) collision
+    for seed in range(8):
+        weights = np.random.default_rng(seed).integers(0, 2 ** 63, size=n_transcripts + 1,
+                                                       dtype=np.uint64)
+        keys = np.add.reduceat(weights[members], run_starts) + weights[-1] * sizes.astype(np.uint64)
+        _, group_first, group_of_kmer = np.unique(keys, return_index=True, return_inverse=True)
+        representative = group_first[group_of_kmer]
+        same = members == members[_segment_positions(run_starts[representative], sizes)]
+        if same.all():
+            break
+    else:
+        raise RuntimeError("Could not group shared k-mers into equivalence classes")
+
+    # Number classes by their first k-mer, as a sequential scan would
+    order = np.argsort(group_first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    first_kmers = group_first[order]
+    class_sizes = sizes[first_kmers]
+    class_indptr = np.concatenate([[0], np.cumsum(class_sizes)]).astype(np.int64)
+    class_transcripts = members[_segment_positions(run_starts[first_kmers], class_sizes)]
+    return ((n_transcripts + rank[group_of_kmer]).astype(np.int32), class_indptr,
+            class_transcripts.astype(np.int32))
+
+
+class KmerIndex:
+    """
+    Sorted k-mer -> equivalence-class index over a transcriptome.
+    """
+
+    ARRAYS = ("kmers", "kmer_classes", "class_indptr", "class_transcripts", "transcript_genes")
+
+    def __init__(self, k: int, kmers: np.ndarray, kmer_classes: np.ndarray,
+                 class_indptr: np.ndarray, class_transcripts: np.ndarray,
+                 transcript_genes: np.ndarray, transcript_names: List[str],
+                 gene_names: List[str], path: Optional[str] = None, digest: Optional[str] = None,
+                 class_genes: Optional[np.ndarray] = None):
+        """
+        Initialize from index arrays (use :meth:`build` or :meth:`load`).
+
+        Args:
+            k: K-mer length
+            kmers: Sorted canonical k-mer codes
+            kmer_classes: Equivalence class of each k-mer
+            class_indptr: CSR offsets of the shared (non-singleton) classes
+            class_transcripts: Transcripts of the shared classes
+            transcript_genes: Gene index of each transcript
+            transcript_names: Transcript IDs
+            gene_names: Gene names
+            path: Directory the index was saved to or loaded from
+            digest: Content hash recorded by :meth:`save`, if known
+            class_genes: Gene of every class as saved by :meth:`save`;
+                derived from the other arrays if not given
+        """
+        self.k = k
+        self.kmers = kmers
+        self.kmer_classes = kmer_classes
+        self.class_indptr = class_indptr
+        self.class_transcripts = class_transcripts
+        self.transcript_genes = transcript_genes
+        self.transcript_names = transcript_names
+        self.gene_names = gene_names
+        self.path = path
+        self.digest = digest
+
+        self.n_transcripts = len(transcript_names)
+        self._class_genes = class_genes if class_genes is not None else self._compute_class_genes()
+        self._intersections: Dict[Tuple[int, ...], int] = {}
+
+    @classmethod
+    def build(cls, fasta_path: str, k: int = 31,
+              gene_map: Optional[Dict[str, str]] = None) -> "KmerIndex":
+        """
+        Build an index from a FASTA transcriptome.
+
+        Args:
+            fasta_path: Transcript sequences
+            k: K-mer length (at most 31)
+            gene_map: Optional transcript ID -> gene mapping; defaults to the
+                gene parsed from each header
+
+        Returns:
+            New index
+        """
+        transcript_names: List[str] = []
+        genes: List[str] = []
+        sequences: List[str] = []
+        for header, seq in read_fasta_records(fasta_path):
+            name = header.split()[0] if header.split() else f"transcript{len(transcript_names) + 1}"
+            gene = gene_map.get(name, name) if gene_map is not None else gene_from_header(header)
+            transcript_names.append(name)
+            genes.append(gene)
+            sequences.append(seq)
+
+        # Encode transcripts in batches of ~BUILD_BATCH_BASES and keep each distinct
+        # (transcript, k-mer) pair once
+        codes = []
+        owners = []
+        start = 0
+        while start < len(sequences):
+            stop, n_bases = start, 0
+            while stop < len(sequences) and (stop == start or n_bases < BUILD_BATCH_BASES):
+                n_bases += len(sequences[stop])
+                stop += 1
+            kmer_codes, source = encode_kmers(sequences[start:stop], k)
+            order = np.lexsort((kmer_codes, source))
+            kmer_codes, source = kmer_codes[order], source[order]
+            distinct = np.ones(kmer_codes.size, dtype=bool)
+            distinct[1:] = (kmer_codes[1:] != kmer_codes[:-1]) | (source[1:] != source[:-1])
+            codes.append(kmer_codes[distinct])
+            owners.append((source[distinct] + start).astype(np.int32))
+            start = stop
+
+        gene_names = sorted(set(genes))
+        gene_ids = {g: i for i, g in enumerate(gene_names)}
+        transcript_genes = np.array([gene_ids[g] for g in genes], dtype=np.int32)
+
+        all_codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.uint64)
+        all_owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.int32)
+        # Pairs are already ordered by transcript, so a stable sort by k-mer keeps each
+        # k-mer's transcripts in ascending order
+        order = np.argsort(all_codes, kind='stable')
+        all_codes, all_owners = all_codes[order], all_owners[order]
+
+        new_kmer = np.ones(all_codes.size, dtype=bool)
+        new_kmer[1:] = all_codes[1:] != all_codes[:-1]
+        first = np.flatnonzero(new_kmer)
+        kmers = all_codes[first]
+        counts = np.diff(np.r_[first, all_codes.size])
+        kmer_classes = all_owners[first].astype(np.int32)
+
+        # Only k-mers shared by several transcripts need a non-singleton class
+        shared = np.flatnonzero(counts > 1)
+        class_of_kmer, class_indptr, class_transcripts = _shared_classes(
+            all_owners, first[shared], counts[shared], len(transcript_names)
+        )
+        kmer_classes[shared] = class_of_kmer
+
+        return cls(k, kmers, kmer_classes, class_indptr, class_transcripts, transcript_genes,
+                   transcript_names, gene_names)
+
+    def content_digest(self) -> str:
+        """
+        Content hash of the index, computed once and stored by :meth:`save`.
+
+        Identifies the index by content, so a rebuilt but identical index
+        maps to the same cached counts.
+        """
+        if self.digest is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(json.dumps([self.k, list(self.gene_names)]).encode())
+            for name in self.ARRAYS:
+                array = np.ascontiguousarray(getattr(self, name))
+                digest.update(f"{name}{array.dtype}{array.shape}".encode())
+                digest.update(array.tobytes())
+            self.digest = digest.hexdigest()
+        return self.digest
+
+    def save(self, directory: str) -> None:
+        """Save the index as ``.npy`` arrays plus a JSON metadata file."""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        # Derived, but saved so loading (and every worker) skips recomputing it
+        np.save(os.path.join(directory, "class_genes.npy"), self._class_genes)
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump({'k': self.k, 'transcripts': self.transcript_names,
+                       'genes': self.gene_names, 'digest': self.content_digest()}, f)
+        self.path = directory
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "KmerIndex":
+        """
+        Load a saved index.
+
+        Args:
+            directory: Directory written by :meth:`save`
+            mmap: Memory-map the arrays instead of reading them into memory
+
+        Returns:
+            Loaded index
+        """
+        with open(os.path.join(directory, "index.json"), "r") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"),
+                                mmap_mode='r' if mmap else None)
+                  for name in cls.ARRAYS}
+        class_genes_path = os.path.join(directory, "class_genes.npy")
+        if os.path.exists(class_genes_path):
+            arrays['class_genes'] = np.load(class_genes_path, mmap_mode='r' if mmap else None)
+        # Indexes saved before the digest was recorded hash their arrays on first use
+        return cls(meta['k'], transcript_names=meta['transcripts'], gene_names=meta['genes'],
+                   path=directory, digest=meta.get('digest'), **arrays)
+
+    # ===================== LOOKUP =====================
+    def class_members(self, class_id: int) -> np.ndarray:
+        """Transcripts belonging to an equivalence class."""
+        if class_id < self.n_transcripts:
+            return np.array([class_id], dtype=np.int32)
+        i = class_id - self.n_transcripts
+        return np.asarray(self.class_transcripts[self.class_indptr[i]:self.class_indptr[i + 1]])
+
+    def _compute_class_genes(self) -> np.ndarray:
+        """Gene of every equivalence class, or -1 if it spans several genes."""
+        n_shared = len(self.class_indptr) - 1
+        class_genes = np.empty(self.n_transcripts + n_shared, dtype=np.int32)
+        class_genes[:self.n_transcripts] = self.transcript_genes
+        if n_shared:
+            # Shared classes are never empty, so each reduceat segment is a whole class
+            member_genes = np.asarray(self.transcript_genes)[np.asarray(self.class_transcripts)]
+            starts = np.asarray(self.class_indptr[:-1])
+            lowest = np.minimum.reduceat(member_genes, starts)
+            highest = np.maximum.reduceat(member_genes, starts)
+            class_genes[self.n_transcripts:] = np.where(lowest == highest, lowest, -1)
+        return class_genes
+
+    def lookup(self, codes: np.ndarray) -> np.ndarray:
+        """Equivalence class of each k-mer code, or -1 if absent from the index."""
+        if self.kmers.size == 0:
+            return np.full(codes.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self.kmers, codes)
+        pos = np.minimum(pos, self.kmers.size - 1)
+        found = self.kmers[pos] == codes
+        return np.where(found, self.kmer_classes[pos], -1).astype(np.int64)
+
+    def _intersect_gene(self, classes: Tuple[int, ...]) -> int:
+        """Gene supported by every class in ``classes``; -1 if ambiguous, -2 if empty."""
+        gene = self._intersections.get(classes)
+        if gene is None:
+            transcripts = self.class_members(classes[0])
+            for class_id in classes[1:]:
+                transcripts = np.intersect1d(transcripts, self.class_members(class_id))
+            genes = np.unique(self.transcript_genes[transcripts])
+            gene = int(genes[0]) if genes.size == 1 else (-1 if genes.size else -2)
+            self._intersections[classes] = gene
+        return gene
+
+    def map_reads(self, reads: Sequence[str]) -> Tuple[np.ndarray, int, int]:
+        """
+        Pseudoalign a batch of reads and count them per gene.
+
+        A read is assigned to a gene when the transcripts compatible with all
+        of its indexed k-mers belong to that single gene.
+
+        Args:
+            reads: Read sequences
+
+        Returns:
+            Tuple of (per-gene counts, ambiguous reads, unmapped reads)
+        """
+        codes, read_ids = encode_kmers(reads, self.k)
+        classes = self.lookup(codes)
+        hit = classes >= 0
+        read_ids, classes = read_ids[hit], classes[hit]
+        if classes.size == 0:
+            return np.zeros(len(self.gene_names), dtype=np.int64), 0, len(reads)
+
+        # Distinct (read, class) pairs, sorted by read
+        pairs = np.unique(read_ids * (len(self._class_genes) + 1) + classes)
+        read_ids = pairs // (len(self._class_genes) + 1)
+        classes = pairs % (len(self._class_genes) + 1)
+
+        starts = np.flatnonzero(np.r_[True, read_ids[1:] != read_ids[:-1]])
+        n_classes = np.diff(np.r_[starts, read_ids.size])
+
+        # Fast path: reads hitting a single class need no intersection
+        read_genes = np.where(n_classes == 1, self._class_genes[classes[starts]], -1)
+        for i in np.flatnonzero(n_classes > 1):
+            start = starts[i]
+            read_genes[i] = self._intersect_gene(tuple(classes[start:start + n_classes[i]].tolist()))
+
+        assigned = read_genes[read_genes >= 0]
+        counts = np.bincount(assigned, minlength=len(self.gene_names)).astype(np.int64)
+        ambiguous = int(np.count_nonzero(read_genes == -1))
+        unmapped = len(reads) - assigned.size - ambiguous
+        return counts, ambiguous, unmapped
+
+
+# ===================== QUANTIFICATION =====================
+def _init_worker(index: Union[str, KmerIndex]) -> None:
+    global _worker_index
+    _worker_index = KmerIndex.load(index) if isinstance(index, str) else index
+
+
+def _map_batch(reads: List[str]) -> Tuple[np.ndarray, int, int]:
+    return _worker_index.map_reads(reads)
+
+
+def _bounded_map(pool: ProcessPoolExecutor, batches: Iterator[List[str]], max_pending: int):
+    """Like ``pool.map`` but keeps at most ``max_pending`` batches in flight, so reads stay streamed."""
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.submit(_map_batch, batch))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def quantify(index: Union[str, KmerIndex], fastq_paths: Dict[str, str],
+             batch_size: int = 100_000, workers: Optional[int] = None,
+             cache: Optional[Any] = None) -> pd.DataFrame:
+    """
+    Per-gene read counts for several FASTQ samples.
+
+    Args:
+        index: Built index or directory of a saved one
+        fastq_paths: Sample name -> FASTQ path
+        batch_size: Reads per mapping task
+        workers: Number of processes (defaults to CPU count; 1 runs in-process).
+            Workers memory-map a saved index instead of receiving a copy.
+        cache: Optional ``result_cache.ResultCache``; per-sample counts are
+            reused while the FASTQ content and the index are unchanged
+
+    Returns:
+        Genes x samples count table; the ``__ambiguous`` and ``__unmapped``
+        rows hold reads that could not be assigned to one gene
+    """
+    if isinstance(index, str):
+        index = KmerIndex.load(index)
+    workers = workers or os.cpu_count() or 1
+    shared = index.path if index.path is not None else index
+
+    # A saved index carries its content hash, so lookups do not rehash the arrays
+    index_key = index.content_digest() if cache is not None else None
+
+    columns = {}
+    pool = None
+    try:
+        for sample, path in fastq_paths.items():
+            def count_sample(path=path):
+                nonlocal pool
+                if pool is None and workers > 1:
+                    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                               initargs=(shared,))
+                batches = read_fastq_batches(path, batch_size)
+                results = (_bounded_map(pool, batches, 2 * workers) if pool
+                           else map(index.map_reads, batches))
+
+                counts = np.zeros(len(index.gene_names), dtype=np.int64)
+                ambiguous = unmapped = 0
+                for batch_counts, batch_ambiguous, batch_unmapped in results:
+                    counts += batch_counts
+                    ambiguous += batch_ambiguous
+                    unmapped += batch_unmapped
+                return np.concatenate([counts, [ambiguous, unmapped]])
+
+            if cache is None:
+                columns[sample] = count_sample()
+            else:
+                columns[sample] = cache.get_or_compute("quantify.counts", count_sample,
+                                                       params={'index': index_key}, inputs=[path])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return pd.DataFrame(columns, index=list(index.gene_names) + ["__ambiguous", "__unmapped"])
@@ -0,0 +1,59 @@
+"""Regression tests for enrichment.enrich."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# result_cache.py lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from enrichment import GeneSetLibrary, enrich  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+
+COLUMNS = ['query', 'term', 'description', 'overlap', 'set_size', 'query_size',
+           'pvalue', 'genes', 'padj']
+
+
+@pytest.fixture
+def library(tmp_path):
+    gmt = tmp_path / "sets.gmt"
+    gmt.write_text(
+        "SET_A\tfirst\tG1\tG2\tG3\tG4\n"
+        "SET_B\tsecond\tG3\tG4\tG5\n"
+        "SET_C\tthird\tG6\tG7\n"
+    )
+    return GeneSetLibrary.from_gmt(str(gmt))
+
+
+def test_cached_library_matches_parsed(library, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    gmt = str(tmp_path / "sets.gmt")
+    GeneSetLibrary.from_gmt(gmt, cache=cache)
+    cached = GeneSetLibrary.from_gmt(gmt, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cached.names == library.names and cached.genes == library.genes
+    assert (cached.membership != library.membership).nnz == 0
+
+
+def test_query_without_library_genes_returns_empty_table(library):
+    result = enrich(library, {'x': ['nope']})
+    assert result.empty
+    assert list(result.columns) == COLUMNS
+
+
+def test_min_overlap_filtering_everything_returns_empty_table(library):
+    result = enrich(library, {'x': ['G1', 'G2', 'G3']}, min_overlap=50)
+    assert result.empty
+    assert list(result.columns) == COLUMNS
+
+
+def test_padj_is_bh_over_whole_library(library):
+    result = enrich(library, {'x': ['G1', 'G2', 'G3'], 'y': ['G6']})
+    assert set(result['query']) == {'x', 'y'}
+    for _, rows in result.groupby('query'):
+        p = np.sort(rows['pvalue'].to_numpy())
+        ranks = np.arange(1, len(p) + 1)
+        expected = np.minimum(np.minimum.accumulate((p * 3 / ranks)[::-1])[::-1], 1)
+        assert np.allclose(np.sort(rows['padj'].to_numpy()), expected)
+    assert result.loc[result['term'] == 'SET_A', 'genes'].iloc[0] == "G1;G2;G3"
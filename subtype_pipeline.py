@@ -0,0 +1,201 @@
+"""
+Cached feature-selection + classifier pipeline for the subtype notebook cells.
+
+Each stage (log2 shift + scaling, feature selection, UMAP, random forest)
+persists its fitted state and output in the shared result cache under a
+key built from the hash of its input data and its own parameters, chained
+from the stage before it.
+Re-running with one parameter changed only recomputes the stages
+downstream of that change.
+"""
+
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_selection import SelectKBest, VarianceThreshold, f_classif
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from result_cache import ResultCache, data_hash
+
+
+class StageCache:
+    """
+    Stage results in a ``ResultCache``, keyed by input hash and parameters.
+    """
+
+    def __init__(self, result_cache: ResultCache):
+        """
+        Initialize the cache.
+
+        Args:
+            result_cache: Shared cache the stage results are stored in
+        """
+        self.result_cache = result_cache
+        self.hits: Dict[str, bool] = {}
+
+    def run(self, stage: str, input_key: str, params: Dict[str, Any],
+            compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return the cached result of ``stage`` or compute and store it.
+
+        Args:
+            stage: Stage name
+            input_key: Key of the stage input (data hash or upstream key)
+            params: Stage parameters
+            compute: Function producing the stage result
+
+        Returns:
+            Stage result, with its own cache key under ``'key'``
+        """
+        name = f"subtype_pipeline.{stage}"
+        misses = self.result_cache.misses
+        result = dict(self.result_cache.get_or_compute(name, compute, params, data=[input_key]))
+        self.hits[stage] = self.result_cache.misses == misses
+        result['key'] = self.result_cache.make_key(name, params, data=[input_key])
+        return result
+
+
+class SubtypeClassifierPipeline:
+    """
+    Log2 shift -> StandardScaler -> feature selection -> UMAP / random forest.
+    """
+
+    def __init__(self, selector: str = "variance", variance_threshold: float = 0.5,
+                 k_best: int = 1000, log_transform: bool = True, scale: bool = True,
+                 umap_params: Optional[Dict[str, Any]] = None, n_estimators: int = 100,
+                 test_size: float = 0.2, stratify: bool = False, random_state: int = 42,
+                 n_jobs: int = -1, result_cache: Optional[ResultCache] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            selector: "variance" (VarianceThreshold) or "kbest" (SelectKBest with f_classif)
+            variance_threshold: Threshold for the variance selector
+            k_best: Number of features kept by the k-best selector
+            log_transform: Apply ``log2(X - min(X) + 1)`` first
+            scale: Standardise features with StandardScaler
+            umap_params: UMAP keyword arguments, or ``None`` to skip the embedding
+            n_estimators: Number of trees in the random forest
+            test_size: Fraction of samples held out for evaluation
+            stratify: Stratify the train/test split by label
+            random_state: Seed for the split, UMAP and the forest
+            n_jobs: Cores used by the forest (-1 = all)
+            result_cache: Cache for the stage results (default: ``ResultCache()``)
+        """
+        if selector not in ("variance", "kbest"):
+            raise ValueError(f"Unknown selector '{selector}', expected 'variance' or 'kbest'")
+
+        self.selector = selector
+        self.variance_threshold = variance_threshold
+        self.k_best = k_best
+        self.log_transform = log_transform
+        self.scale = scale
+        self.umap_params = umap_params
+        self.n_estimators = n_estimators
+        self.test_size = test_size
+        self.stratify = stratify
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.cache = StageCache(result_cache if result_cache is not None else ResultCache())
+
+    # ===================== STAGES =====================
+    def _preprocess(self, X: np.ndarray) -> Dict[str, Any]:
+        values = X
+        if self.log_transform:
+            values = np.log2(values - values.min() + 1)
+        scaler = None
+        if self.scale:
+            scaler = StandardScaler()
+            values = scaler.fit_transform(values)
+        return {'X': values.astype(np.float32), 'scaler': scaler}
+
+    def _select(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+        if self.selector == "variance":
+            selector = VarianceThreshold(threshold=self.variance_threshold)
+            X_sel = selector.fit_transform(X)
+        else:
+            selector = SelectKBest(score_func=f_classif, k=min(self.k_best, X.shape[1]))
+            X_sel = selector.fit_transform(X, y)
+        return {'X': np.ascontiguousarray(X_sel, dtype=np.float32),
+                'selector': selector, 'mask': selector.get_support()}
+
+    def _embed(self, X: np.ndarray) -> Dict[str, Any]:
+        import umap.umap_ as umap
+
+        params = dict(self.umap_params)
+        params.setdefault('random_state', self.random_state)
+        model = umap.UMAP(**params)
+        return {'embedding': model.fit_transform(X).astype(np.float32)}
+
+    def _train(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+        indices = np.arange(X.shape[0])
+        train_idx, test_idx = train_test_split(
+            indices, test_size=self.test_size, random_state=self.random_state,
+            stratify=y if self.stratify else None
+        )
+        model = RandomForestClassifier(n_estimators=self.n_estimators,
+                                       random_state=self.random_state, n_jobs=self.n_jobs)
+        model.fit(X[train_idx], y[train_idx])
+        return {'model': model, 'train_idx': train_idx, 'test_idx': test_idx,
+                'y_pred': model.predict(X[test_idx])}
+
+    # ===================== RUN =====================
+    def run(self, X: pd.DataFrame, y: Sequence) -> Dict[str, Any]:
+        """
+        Run every stage, reusing cached results where inputs and parameters match.
+
+        Args:
+            X: Samples x genes expression table
+            y: Encoded subtype label per sample
+
+        Returns:
+            Dictionary with the fitted 'scaler', 'selector', 'model',
+            'selected_features', 'embedding' (or None), 'X_selected',
+            'train_idx', 'test_idx', 'y_test', 'y_pred' and the per-stage
+            'cache_hits'
+        """
+        features = pd.Index(X.columns) if isinstance(X, pd.DataFrame) else None
+        values = np.asarray(X, dtype=np.float32)
+        labels = np.asarray(y)
+        input_key = data_hash(values, [] if features is None else list(map(str, features)))
+        labels_key = data_hash(labels)
+
+        prep = self.cache.run("preprocess", input_key,
+                              {'log_transform': self.log_transform, 'scale': self.scale},
+                              lambda: self._preprocess(values))
+        # Only the k-best selector looks at the labels
+        if self.selector == "variance":
+            select_params = {'selector': self.selector, 'variance_threshold': self.variance_threshold}
+        else:
+            select_params = {'selector': self.selector, 'k_best': self.k_best, 'labels': labels_key}
+        selected = self.cache.run("select", prep['key'], select_params,
+                                  lambda: self._select(prep['X'], labels))
+
+        embedding = None
+        if self.umap_params is not None:
+            embedding = self.cache.run("umap", selected['key'],
+                                       {'umap': self.umap_params, 'random_state': self.random_state},
+                                       lambda: self._embed(selected['X']))['embedding']
+
+        trained = self.cache.run("train", selected['key'],
+                                 {'labels': labels_key, 'n_estimators': self.n_estimators,
+                                  'test_size': self.test_size,
+                                  'stratify': self.stratify, 'random_state': self.random_state},
+                                 lambda: self._train(selected['X'], labels))
+
+        return {
+            'scaler': prep['scaler'],
+            'selector': selected['selector'],
+            'model': trained['model'],
+            'selected_features': features[selected['mask']] if features is not None else selected['mask'],
+            'embedding': embedding,
+            'X_selected': selected['X'],
+            'train_idx': trained['train_idx'],
+            'test_idx': trained['test_idx'],
+            'y_test': labels[trained['test_idx']],
+            'y_pred': trained['y_pred'],
+            'cache_hits': dict(self.cache.hits),
+        }
@@ -0,0 +1,104 @@
+"""Round-trip tests for result_cache.ResultCache."""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from result_cache import ResultCache, data_hash
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache"))
+
+
+def roundtrip(cache, value):
+    """Store ``value``, then return what a fresh lookup of the same key loads."""
+    cache.get_or_compute("test", lambda: value)
+    calls = []
+    loaded = cache.get_or_compute("test", lambda: calls.append(1))
+    assert not calls, "second lookup recomputed"
+    return loaded
+
+
+def test_dataframe_keeps_index(cache):
+    frame = pd.DataFrame({'score': [1.5, 2.5]}, index=pd.Index(['g1', 'g2'], name='gene'))
+    pd.testing.assert_frame_equal(roundtrip(cache, frame), frame)
+
+
+def test_dataframe_keeps_none_in_object_columns(cache):
+    frame = pd.DataFrame({'label': pd.Series(['a', None], dtype=object), 'n': [1, 2]})
+    loaded = roundtrip(cache, frame)
+    assert loaded['label'].iloc[1] is None
+    pd.testing.assert_frame_equal(loaded, frame)
+
+
+def test_dataframe_keeps_string_dtypes(cache):
+    frame = pd.DataFrame({'obj': ['a', 'b'], 'text': ['c', 'd']},
+                         index=pd.MultiIndex.from_tuples([('x', 1), ('y', 2)], names=['k', None]))
+    frame['obj'] = frame['obj'].astype(object)
+    pd.testing.assert_frame_equal(roundtrip(cache, frame), frame)
+
+
+def test_object_array_with_none(cache):
+    array = np.array(['a', None], dtype=object)
+    assert list(roundtrip(cache, array)) == ['a', None]
+
+
+def test_tuple_stays_tuple(cache):
+    assert roundtrip(cache, (1, 2)) == (1, 2)
+    assert roundtrip(ResultCache(cache.cache_dir + "-b"), {'pair': (1, 2)}) == {'pair': (1, 2)}
+
+
+def test_dict_with_non_string_keys(cache):
+    assert roundtrip(cache, {33: 5}) == {33: 5}
+    assert roundtrip(ResultCache(cache.cache_dir + "-b"), {'../x': 1, 'manifest': 2}) == \
+        {'../x': 1, 'manifest': 2}
+
+
+def test_none_result_is_cached(cache):
+    assert roundtrip(cache, None) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_named_arrays_are_memory_mapped(cache):
+    loaded = roundtrip(cache, {'coords': np.arange(6.0).reshape(3, 2), 'labels': np.array(['x', 'y'], dtype=object)})
+    assert isinstance(loaded['coords'], np.memmap)
+    assert list(loaded['labels']) == ['x', 'y']
+
+
+def test_data_hash_of_strings_is_stable_across_processes():
+    code = ("import numpy as np, pandas as pd; from result_cache import data_hash; "
+            "print(data_hash(np.asarray(pd.Series(['LumA', 'Basal'], dtype=object)), "
+            "pd.DataFrame({'label': ['a', 'b'], 'n': [1.0, 2.0]})))")
+    digests = {subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(__file__),
+                              capture_output=True, text=True, check=True).stdout
+               for _ in range(2)}
+    assert len(digests) == 1
+
+
+def test_data_hash_covers_dataframe_index():
+    assert data_hash(pd.DataFrame({'x': [1.0]}, index=['g1'])) != \
+        data_hash(pd.DataFrame({'x': [1.0]}, index=['g2']))
+
+
+def test_data_hash_rejects_arbitrary_objects():
+    with pytest.raises(TypeError):
+        data_hash(np.array([object()], dtype=object))
+
+
+def test_lock_files_stay_bounded(cache):
+    for i in range(200):
+        cache.get_or_compute("test", lambda: i, params={'i': i})
+    assert len(os.listdir(os.path.join(cache.cache_dir, ".locks"))) <= 65
+
+
+def test_nested_compute_does_not_deadlock(cache):
+    # Enough inner keys that some share the outer key's lock stripe
+    def outer():
+        return [cache.get_or_compute("inner", lambda: i, params={'i': i}) for i in range(200)]
+    assert cache.get_or_compute("outer", outer) == list(range(200))